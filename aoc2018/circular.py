@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+from array import array
+from typing import Iterable, Iterator
+
+
+class CircularList:
+    """
+    A circular linked list over the nodes 0..size-1, stored as successor (and
+    optionally predecessor) arrays instead of one object per node. A node is
+    just its index, so puzzles whose items are labelled 0..n-1 (marbles, cups)
+    can use the labels directly.
+
+    Every node starts out linked to itself; build bigger rings with
+    `insert_after` / `splice_after` or the `from_sequence` constructor.
+    """
+    next: array
+    prev: array | None
+
+    def __init__(self, size: int, doubly_linked: bool = True):
+        self.next = array('I', range(size))
+        self.prev = array('I', range(size)) if doubly_linked else None
+
+    @classmethod
+    def from_sequence(cls, nodes: Iterable[int], size: int, doubly_linked: bool = True) -> CircularList:
+        """Links `nodes` into a ring in the given order. Nodes not mentioned stay on their own."""
+        circle = cls(size, doubly_linked)
+        nxt = circle.next
+        iterator = iter(nodes)
+        first = previous = next(iterator)
+        for node in iterator:
+            nxt[previous] = node
+            previous = node
+        nxt[previous] = first
+        if doubly_linked:
+            prv = circle.prev
+            node = first
+            while True:
+                prv[nxt[node]] = node
+                node = nxt[node]
+                if node == first:
+                    break
+        return circle
+
+    def insert_after(self, node: int, new_node: int):
+        nxt = self.next
+        old_next = nxt[node]
+        nxt[node] = new_node
+        nxt[new_node] = old_next
+        if self.prev is not None:
+            self.prev[new_node] = node
+            self.prev[old_next] = new_node
+
+    def remove(self, node: int):
+        """Unlinks `node`; it's left pointing at itself."""
+        if self.prev is None:
+            raise ValueError('remove needs a doubly linked list; use remove_after instead')
+        nxt = self.next
+        prv = self.prev
+        before = prv[node]
+        after = nxt[node]
+        nxt[before] = after
+        prv[after] = before
+        nxt[node] = prv[node] = node
+
+    def remove_after(self, node: int, count: int) -> tuple[int, int]:
+        """
+        Unlinks the `count` nodes following `node` and returns the (first, last)
+        nodes of the removed run, which stays linked internally so it can be
+        spliced back in elsewhere.
+        """
+        nxt = self.next
+        first = last = nxt[node]
+        for _ in range(count - 1):
+            last = nxt[last]
+        after = nxt[last]
+        nxt[node] = after
+        if self.prev is not None:
+            self.prev[after] = node
+        return first, last
+
+    def splice_after(self, node: int, first: int, last: int):
+        """Links the run first..last (as returned by `remove_after`) in after `node`."""
+        nxt = self.next
+        after = nxt[node]
+        nxt[node] = first
+        nxt[last] = after
+        if self.prev is not None:
+            self.prev[first] = node
+            self.prev[after] = last
+
+    def step_back(self, node: int, count: int) -> int:
+        prv = self.prev
+        for _ in range(count):
+            node = prv[node]
+        return node
+
+    def iter_from(self, node: int) -> Iterator[int]:
+        """Yields every node in the ring once, starting at `node`."""
+        nxt = self.next
+        current = node
+        while True:
+            yield current
+            current = nxt[current]
+            if current == node:
+                break
+
+
+class ObjectNode:
+    """Object-per-node linked list, the same shape as day 9's `Marble`, for comparison."""
+    __slots__ = ['value', 'next', 'prev']
+
+    def __init__(self, value: int):
+        self.value = value
+        self.next = self
+        self.prev = self
+
+
+def benchmark_objects(size: int):
+    current = ObjectNode(0)
+    for value in range(1, size):
+        node = ObjectNode(value)
+        after = current.next
+        current.next = node
+        node.prev = current
+        node.next = after
+        after.prev = node
+        current = node
+    # rotate a run of three nodes forward, crab cups style
+    for _ in range(size):
+        first = current.next
+        last = first.next.next
+        after = last.next
+        current.next = after
+        after.prev = current
+        destination = after.next
+        destination_next = destination.next
+        destination.next = first
+        first.prev = destination
+        last.next = destination_next
+        destination_next.prev = last
+        current = after
+    return current
+
+
+def benchmark_arrays(size: int):
+    # same operations as benchmark_objects, written against the arrays directly
+    circle = CircularList(size)
+    nxt = circle.next
+    prv = circle.prev
+    current = 0
+    for node in range(1, size):
+        after = nxt[current]
+        nxt[current] = node
+        prv[node] = current
+        nxt[node] = after
+        prv[after] = node
+        current = node
+    for _ in range(size):
+        first = nxt[current]
+        last = nxt[nxt[first]]
+        after = nxt[last]
+        nxt[current] = after
+        prv[after] = current
+        destination = nxt[after]
+        destination_next = nxt[destination]
+        nxt[destination] = first
+        prv[first] = destination
+        nxt[last] = destination_next
+        prv[destination_next] = last
+        current = after
+    return circle
+
+
+def benchmark_methods(size: int):
+    circle = CircularList(size)
+    insert_after = circle.insert_after
+    current = 0
+    for node in range(1, size):
+        insert_after(current, node)
+        current = node
+    nxt = circle.next
+    remove_after = circle.remove_after
+    splice_after = circle.splice_after
+    for _ in range(size):
+        first, last = remove_after(current, 3)
+        after = nxt[current]
+        splice_after(nxt[after], first, last)
+        current = after
+    return circle
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000_000, 10_000_000]
+    for size in sizes:
+        for name, benchmark in (
+            ('objects', benchmark_objects),
+            ('arrays', benchmark_arrays),
+            ('CircularList methods', benchmark_methods),
+        ):
+            start = time.perf_counter()
+            benchmark(size)
+            elapsed = time.perf_counter() - start
+
+            # measured on a separate run, since tracing every allocation skews the timing
+            tracemalloc.start()
+            benchmark(size)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f'{name} n={size:,}: {elapsed:.2f}s ({2 * size / elapsed:,.0f} ops/s), '
+                  f'peak memory {peak / 2 ** 20:.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
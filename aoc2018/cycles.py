@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from typing import Callable, Generic, Hashable, NamedTuple, Optional, TypeVar
+
+State = TypeVar('State')
+
+
+class CycleResult(NamedTuple, Generic[State]):
+    state: State
+    # how many times step_fn was actually called
+    simulated_steps: int
+    # None if target_steps was reached before anything repeated
+    cycle_start: Optional[int]
+    cycle_length: Optional[int]
+    # how far the pattern moves every cycle (always 0 for a pure cycle)
+    drift: int
+
+
+def run_until_cycle(
+        step_fn: Callable[[State], State],
+        state: State,
+        target_steps: int,
+        key: Callable[[State], Hashable] = lambda s: s,
+        position: Optional[Callable[[State], int]] = None,
+        shift: Optional[Callable[[State, int], State]] = None,
+) -> CycleResult[State]:
+    """
+    Applies `step_fn` to `state` `target_steps` times, but stops as soon as a
+    state repeats and extrapolates straight to the final state.
+
+    `key` canonicalizes a state for hashing. For patterns that can repeat while
+    sliding along (like day 12's plants), `key` should describe the state
+    relative to `position(state)`, and `shift(state, amount)` must move a state
+    by that amount; step_fn has to commute with shifting for this to be valid.
+    """
+    if (position is None) != (shift is None):
+        raise ValueError('position and shift must be given together')
+
+    states = [state]
+    seen: dict[Hashable, int] = {key(state): 0}
+    for step in range(1, target_steps + 1):
+        state = step_fn(state)
+        state_key = key(state)
+        previous_step = seen.get(state_key)
+        if previous_step is None:
+            seen[state_key] = step
+            states.append(state)
+            continue
+
+        cycle_length = step - previous_step
+        full_cycles, remainder = divmod(target_steps - step, cycle_length)
+        final_state = states[previous_step + remainder]
+        drift = 0
+        if position is not None:
+            drift = position(state) - position(states[previous_step])
+            if drift:
+                # `state` is states[previous_step] moved by one drift, and every
+                # further full cycle moves it one more
+                final_state = shift(final_state, drift * (full_cycles + 1))
+        return CycleResult(final_state, step, previous_step, cycle_length, drift)
+
+    return CycleResult(state, target_steps, None, None, 0)
@@ -3,6 +3,8 @@ from collections import defaultdict, namedtuple
 import re
 import sys
 
+import numpy as np
+
 """
 position=< 54359,  43457> velocity=<-5, -4>
 position=<-21470, -10698> velocity=< 2,  1>
@@ -22,6 +24,19 @@ class Light:
 
 
 def main():
+    positions, velocities = read_lights(sys.argv[1])
+    time = convergence_time(positions, velocities)
+    frame = render(positions + time * velocities)
+    print(frame)
+    print(read_message(frame))
+    print(time)
+
+    if len(sys.argv) > 2 and sys.argv[2] == 'stepping':
+        main_stepping()
+
+
+def main_stepping():
+    """The original version: steps every light one second at a time, printing every small enough frame."""
     pattern = re.compile(r'position=<\s*(-?\d+),\s*(-?\d+)> velocity=<\s*(-?\d+),\s*(-?\d+)>')
     lights = []
     with open(sys.argv[1]) as f:
@@ -66,5 +81,123 @@ def visualize_lights(lights: list[Light]):
     print('\n'.join(''.join(row) for row in grid))
 
 
+def read_lights(path: str) -> tuple[np.ndarray, np.ndarray]:
+    """Positions and velocities, one (x, y) row per light."""
+    with open(path) as f:
+        values = np.array([[int(v) for v in re.findall(r'-?\d+', line)] for line in f if line.strip()])
+    return values[:, :2], values[:, 2:]
+
+
+def bounding_area(positions: np.ndarray, velocities: np.ndarray, time: int) -> int:
+    moved = positions + time * velocities
+    width, height = moved.max(axis=0) - moved.min(axis=0) + 1
+    return int(width) * int(height)
+
+
+def estimate_convergence_time(positions: np.ndarray, velocities: np.ndarray) -> int:
+    """
+    On each axis the spread is decided by the fastest lights each way, so it
+    shrinks until the lights with the lowest velocity meet the ones with the
+    highest. Returns the average of those meeting times over both axes.
+    """
+    times = []
+    for axis in (0, 1):
+        axis_positions = positions[:, axis]
+        axis_velocities = velocities[:, axis]
+        slowest, fastest = axis_velocities.min(), axis_velocities.max()
+        if slowest == fastest:
+            continue
+        behind = axis_positions[axis_velocities == fastest].mean()
+        ahead = axis_positions[axis_velocities == slowest].mean()
+        times.append((ahead - behind) / (fastest - slowest))
+    return max(0, round(sum(times) / len(times))) if times else 0
+
+
+def convergence_time(positions: np.ndarray, velocities: np.ndarray) -> int:
+    """
+    The time with the smallest bounding box: the analytic estimate, refined by
+    a ternary search on the area in a window around it. The window is widened
+    until the area grows at both ends, so a rough estimate still brackets the
+    minimum.
+    """
+    def area(t: int) -> int:
+        return bounding_area(positions, velocities, t)
+
+    estimate = estimate_convergence_time(positions, velocities)
+    radius = 8
+    low, high = max(0, estimate - radius), estimate + radius
+    while low > 0 and area(low - 1) < area(low):
+        low = max(0, low - radius)
+        radius *= 2
+    while area(high + 1) < area(high):
+        high += radius
+        radius *= 2
+
+    while high - low > 2:
+        third = (high - low) // 3
+        left, right = low + third, high - third
+        if area(left) < area(right):
+            high = right
+        else:
+            low = left
+    return min(range(low, high + 1), key=area)
+
+
+def render(points: np.ndarray) -> str:
+    points = points - points.min(axis=0)
+    width, height = points.max(axis=0) + 1
+    grid = np.full((height, width), '.')
+    grid[points[:, 1], points[:, 0]] = '#'
+    return '\n'.join(''.join(row) for row in grid)
+
+
+# The font the messages are written in: 6 wide (some letters leave a column
+# blank) and 10 tall
+GLYPHS = {
+    'A': '..##.. .#..#. #....# #....# #....# ###### #....# #....# #....# #....#',
+    'B': '#####. #....# #....# #....# #####. #....# #....# #....# #....# #####.',
+    'C': '.####. #....# #..... #..... #..... #..... #..... #..... #....# .####.',
+    'E': '###### #..... #..... #..... #####. #..... #..... #..... #..... ######',
+    'F': '###### #..... #..... #..... #####. #..... #..... #..... #..... #.....',
+    'G': '.####. #....# #..... #..... #..... #..### #....# #....# #...## .###.#',
+    'H': '#....# #....# #....# #....# ###### #....# #....# #....# #....# #....#',
+    'J': '...### ....#. ....#. ....#. ....#. ....#. ....#. #...#. #...#. .###..',
+    'K': '#....# #...#. #..#.. #.#... ##.... ##.... #.#... #..#.. #...#. #....#',
+    'L': '#..... #..... #..... #..... #..... #..... #..... #..... #..... ######',
+    'N': '#....# ##...# ##...# #.#..# #.#..# #..#.# #..#.# #...## #...## #....#',
+    'P': '#####. #....# #....# #....# #####. #..... #..... #..... #..... #.....',
+    'R': '#####. #....# #....# #....# #####. #..#.. #...#. #...#. #....# #....#',
+    'X': '#....# #....# .#..#. .#..#. ..##.. ..##.. .#..#. .#..#. #....# #....#',
+    'Z': '###### .....# .....# ....#. ...#.. ..#... .#.... #..... #..... ######',
+}
+
+
+def trim_glyph(rows: list[str]) -> str:
+    """Drops blank columns from both sides, so glyphs match however they were cut out."""
+    columns = [i for i in range(len(rows[0])) if any(row[i] == '#' for row in rows)]
+    return ' '.join(row[columns[0]:columns[-1] + 1] for row in rows)
+
+
+GLYPHS_BY_SHAPE = {trim_glyph(shape.split()): letter for letter, shape in GLYPHS.items()}
+
+
+def read_message(frame: str) -> str:
+    """
+    Reads the letters in a rendered frame, splitting it into glyphs at blank
+    columns. Anything that isn't in the font comes out as '?'.
+    """
+    rows = frame.split('\n')
+    blank = [all(row[i] == '.' for row in rows) for i in range(len(rows[0]))]
+    message = []
+    start = None
+    for i, is_blank in enumerate(blank + [True]):
+        if not is_blank and start is None:
+            start = i
+        elif is_blank and start is not None:
+            message.append(GLYPHS_BY_SHAPE.get(trim_glyph([row[start:i] for row in rows]), '?'))
+            start = None
+    return ''.join(message)
+
+
 if __name__ == '__main__':
     main()
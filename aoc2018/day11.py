@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import math
+import time
 from collections import namedtuple
 from typing import Optional
 
+from aoc2018.summed_area import best_square
+
 
 def main():
     serial_number = 9445
@@ -17,23 +20,23 @@ def main():
     # too slow by far!
     # part2_direct(grid)
 
+    start = time.perf_counter()
+    part2(grid)
+    print(f'summed-area table time: {time.perf_counter() - start:.3f}s')
+
+    start = time.perf_counter()
     part2_dynamic(grid)
+    print(f'dynamic time: {time.perf_counter() - start:.3f}s')
 
 
 def part1(grid: list[list[int]]):
-    subtotals: list[list[Optional[int]]] = [[None] * 298 for _ in range(298)]
-    max_sum = -math.inf
-    best_coord = None
-    for y in range(298):
-        for x in range(298):
-            subtotals[y][x] = sum(grid[y + dy][x + dx]
-                                  for dy in range(3)
-                                  for dx in range(3))
-            if subtotals[y][x] > max_sum:
-                max_sum = subtotals[y][x]
-                best_coord = (x, y)
+    best = best_square(grid, [3])
+    print(f'{best.start_x + 1},{best.start_y + 1}')
+
 
-    print(f'{best_coord[0] + 1},{best_coord[1] + 1}')
+def part2(grid: list[list[int]]):
+    best = best_square(grid, range(1, len(grid) + 1))
+    print(f'{best.start_x + 1},{best.start_y + 1},{best.size}')
 
 
 Segment = namedtuple('Segment', ['start_x', 'start_y', 'end_x', 'end_y'])
@@ -42,7 +45,7 @@ Square = namedtuple('Square', ['start_x', 'start_y', 'size'])
 
 def part2_direct(grid: list[list[int]]):
     best_total = -math.inf
-    best_square = None
+    best = None
 
     for size in range(1, 301):
         print('Checking size', size)
@@ -53,9 +56,9 @@ def part2_direct(grid: list[list[int]]):
                                for dx in range(size))
                 if subtotal > best_total:
                     best_total = subtotal
-                    best_square = Square(x, y, size)
+                    best = Square(x, y, size)
 
-    print(f'{best_square.start_x + 1},{best_square.start_y + 1},{best_square.size}')
+    print(f'{best.start_x + 1},{best.start_y + 1},{best.size}')
 
 
 def part2_dynamic(grid: list[list[int]]):
@@ -85,7 +88,7 @@ def part2_dynamic(grid: list[list[int]]):
             vertical_segments[y][x] = running_total
 
     best_total = -math.inf
-    best_square = None
+    best = None
     subtotals: list[list[Optional[int]]] = [
         [None] * 300
         for _ in range(300)
@@ -96,7 +99,7 @@ def part2_dynamic(grid: list[list[int]]):
             subtotals[y][x] = subtotal
             if subtotal > best_total:
                 best_total = subtotal
-                best_square = Square(x, y, 1)
+                best = Square(x, y, 1)
 
     for size in range(2, 301):
         n = 301 - size
@@ -137,11 +140,11 @@ def part2_dynamic(grid: list[list[int]]):
                 next_subtotals[y][x] = subtotal
                 if subtotal > best_total:
                     best_total = subtotal
-                    best_square = Square(x, y, size)
+                    best = Square(x, y, size)
 
         subtotals = next_subtotals
 
-    print(f'{best_square.start_x + 1},{best_square.start_y + 1},{best_square.size}')
+    print(f'{best.start_x + 1},{best.start_y + 1},{best.size}')
 
 
 def compute_power_level(x: int, y: int, serial_number: int):
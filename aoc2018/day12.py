@@ -1,5 +1,8 @@
 import re
 import sys
+import time
+
+from aoc2018.cycles import run_until_cycle
 
 
 def main():
@@ -15,8 +18,17 @@ def main():
     print(positive_states)
 
     print(iterate(initial, positive_states, 20))
+    print(iterate_bits(initial, positive_states, 20))
     print(iterate_set(initial, positive_states, 50_000_000_000))
 
+    if len(sys.argv) > 2:
+        # brute force benchmark, no cycle detection
+        generations = int(sys.argv[2])
+        start = time.perf_counter()
+        total = iterate_bits(initial, positive_states, generations)
+        elapsed = time.perf_counter() - start
+        print(f'{total} after {generations} generations in {elapsed:.2f}s ({generations / elapsed:,.0f} generations/s)')
+
 
 def iterate(initial: str, positive_states: list[str], generations: int) -> int:
     # This regex will match a zero-length string that is followed by any of the strings that will result in a new plant
@@ -42,30 +54,83 @@ def iterate(initial: str, positive_states: list[str], generations: int) -> int:
     return sum(i + start_index for i, char in enumerate(state) if char == '#')
 
 
+def iterate_bits(initial: str, positive_states: list[str], generations: int) -> int:
+    """
+    Bit-parallel version: the whole row of pots is one int, where bit j is pot
+    `offset + j`. Shifting the row gives five "planes" holding each pot's
+    neighbours at -2..+2, and a pot gets a plant if its five neighbour bits
+    match any of the positive rules, which is a handful of big-int ANDs/ORs per
+    generation regardless of how many pots there are.
+    """
+    if '.....' in positive_states:
+        raise ValueError('Rule ..... => # would fill the infinite row with plants')
+
+    # 32-entry lookup table over 5-bit neighbourhoods, with pot -2 as the high bit
+    lookup = [False] * 32
+    for positive_state in positive_states:
+        lookup[int(positive_state.replace('#', '1').replace('.', '0'), 2)] = True
+    # spell the rules out as one sum-of-products expression over the planes (p0..p4) and their complements (n0..n4)
+    expression = ' | '.join(
+        '(' + ' & '.join(f'p{k}' if index >> (4 - k) & 1 else f'n{k}' for k in range(5)) + ')'
+        for index, positive in enumerate(lookup) if positive
+    )
+    apply_rules = eval(f'lambda p0, p1, p2, p3, p4, n0, n1, n2, n3, n4: {expression or 0}')
+
+    row = sum(1 << j for j, char in enumerate(initial) if char == '#')
+    offset = 0
+    for _ in range(generations):
+        # the new row covers two more pots on each side, so it starts at offset - 2
+        mask = (1 << (row.bit_length() + 4)) - 1
+        p0, p1, p2, p3, p4 = row << 4, row << 3, row << 2, row << 1, row
+        new_row = apply_rules(p0, p1, p2, p3, p4, p0 ^ mask, p1 ^ mask, p2 ^ mask, p3 ^ mask, p4 ^ mask)
+        offset -= 2
+
+        if not new_row:
+            return 0
+        # drop empty pots from the left end so the row doesn't grow as plants drift right
+        trailing_zeros = (new_row & -new_row).bit_length() - 1
+        row = new_row >> trailing_zeros
+        offset += trailing_zeros
+
+    return sum(offset + j for j in range(row.bit_length()) if row >> j & 1)
+
+
 def iterate_set(initial: str, positive_states: list[str], generations: int) -> int:
     # sparse representation of the number line - set of all indices marked with '#'
-    initial_state = {i for i, char in enumerate(initial) if char == '#'}
+    initial_state = frozenset(i for i, char in enumerate(initial) if char == '#')
     boolean_patterns = {
         tuple(c == '#' for c in positive_state)
         for positive_state in positive_states
     }
-    state = initial_state
-    for g in range(generations):
+
+    def step(state: frozenset[int]) -> frozenset[int]:
+        if not state:
+            return state
         new_state = set()
         for i in range(min(state) - 4, max(state) + 1):
             current = tuple(((i + delta) in state) for delta in range(5))
             if current in boolean_patterns:
                 new_state.add(i + 2)
-        if new_state == {index + 1 for index in state}:
-            # I'm not sure if this is guaranteed for all inputs, but for my input the plants eventually reached
-            # a stable pattern where all plants would move one spot to the right between every generation. Once this is
-            # reached, we can take a shortcut!
-            print('Reached stable pattern at generation', g)
-            return sum(generations - g - 1 + index for index in new_state)
-        state = new_state
+        return frozenset(new_state)
+
+    # The plants eventually settle into a pattern that just slides along the number line (for my input, one spot
+    # to the right every generation), so compare generations relative to their left-most plant.
+    result = run_until_cycle(
+        step,
+        initial_state,
+        generations,
+        key=lambda state: tuple(sorted(index - pot_position(state) for index in state)),
+        position=pot_position,
+        shift=lambda state, amount: frozenset(index + amount for index in state),
+    )
+    print(f'Simulated {result.simulated_steps} of {generations} generations '
+          f'(cycle of length {result.cycle_length} drifting by {result.drift})')
+    return sum(result.state)
+
 
-    return sum(state)
+def pot_position(state: frozenset[int]) -> int:
+    return min(state, default=0)
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import heapq
 import itertools
+import random
 import re
 import sys
+import time
+from typing import NamedTuple, Optional
 
 # represent points as complex numbers - real component is x, imaginary component is y
 Point = complex
@@ -87,7 +91,14 @@ def main():
             carts[cart.position] = cart
         tracks.append(vertical_cart_pattern.sub('|', horizontal_cart_pattern.sub('-', row)))
 
-    run_simulation(tracks, carts)
+    first_crash, last_cart = CartSimulator(grid).run()
+    print(first_crash)
+    print(last_cart)
+
+    if len(sys.argv) > 2 and sys.argv[2] == 'ticks':
+        run_simulation(tracks, carts)
+    elif len(sys.argv) > 2 and sys.argv[2] == 'benchmark':
+        benchmark()
 
 
 def run_simulation(tracks: list[str], carts: dict[Point, Cart]):
@@ -105,5 +116,302 @@ def run_simulation(tracks: list[str], carts: dict[Point, Cart]):
             break
 
 
+# cart heading -> heading after the track piece it has just moved onto,
+# written as (dx, dy) so they don't depend on the width of the map
+CURVES = {
+    '/': {(1, 0): (0, -1), (0, -1): (1, 0), (-1, 0): (0, 1), (0, 1): (-1, 0)},
+    '\\': {(1, 0): (0, 1), (0, 1): (1, 0), (-1, 0): (0, -1), (0, -1): (-1, 0)},
+}
+INTERSECTION_TURNS = [
+    {(1, 0): (0, -1), (0, -1): (-1, 0), (-1, 0): (0, 1), (0, 1): (1, 0)},  # TURN_LEFT
+    {(1, 0): (1, 0), (0, -1): (0, -1), (-1, 0): (-1, 0), (0, 1): (0, 1)},  # STRAIGHT
+    {(1, 0): (0, 1), (0, 1): (-1, 0), (-1, 0): (0, -1), (0, -1): (1, 0)},  # TURN_RIGHT
+]
+CART_HEADINGS = {'<': (-1, 0), '>': (1, 0), '^': (0, -1), 'v': (0, 1)}
+NODE_TILES = {'/', '\\', '+'}
+CART_PATTERN = re.compile(r'[<>v^]')
+# the track under each cart
+CART_TRACKS = str.maketrans('<>^v', '--||')
+
+
+class Piece(NamedTuple):
+    """
+    A cart going down one straight segment: it's on `start + step * (tick - start_tick)`
+    at the end of each tick, and strictly between the segment's end nodes
+    from `first_tick` to `last_tick`.
+    """
+    cart: int
+    start: int
+    step: int
+    start_tick: int
+    first_tick: int
+    last_tick: int
+
+    def position(self, tick: int) -> int:
+        return self.start + self.step * (tick - self.start_tick)
+
+
+class CartSimulator:
+    """
+    Event-driven version of run_simulation. Squares are numbered `y * width + x`,
+    which is also the order carts take their turns in. The track is a graph
+    of straight segments between nodes (curves and intersections), and each
+    cart moves a whole segment per event.
+
+    Carts only affect each other by crashing, so when a cart starts down a
+    segment, its crashes with the carts it could meet there are worked out up
+    front. Carts can only meet inside a segment they're both on, or on a node
+    they both pass through, so those are the only places that get checked.
+    Crashes go on the same priority queue as segment arrivals, keyed by
+    (tick, square the moving cart started the tick on), and are skipped if
+    an earlier crash has already taken out one of the carts.
+    """
+    width: int
+    tiles: str
+    # (square, step) -> (next node that way, how far away it is)
+    segments: dict[tuple[int, int], tuple[int, int]]
+    steps: dict[tuple[int, int], int]
+    headings: dict[int, tuple[int, int]]
+    alive: list[bool]
+    next_turns: list[int]
+    # the piece each cart is on now
+    pieces: list[Optional[Piece]]
+    # (lower end node, higher end node) -> pieces that might still meet new ones
+    pieces_by_segment: dict[tuple[int, int], list[Piece]]
+    # tick -> node -> [(cart, square it moved onto the node from)], dropped once it's too old to matter
+    node_visits: dict[int, dict[int, list[tuple[int, int]]]]
+    visit_ticks: list[int]
+    # arrivals are (tick, -1, cart, node, step),
+    # crashes are (tick, square the moving cart started on, cart, other cart, square)
+    events: list[tuple[int, int, int, int, int]]
+    tick: int
+
+    def __init__(self, grid: list[str]):
+        self.width = max(len(row) for row in grid)
+        tiles = ''.join(row.ljust(self.width) for row in grid)
+        starts = [(match.start(), CART_HEADINGS[match[0]]) for match in CART_PATTERN.finditer(tiles)]
+        self.tiles = tiles.translate(CART_TRACKS)
+
+        self.steps = {heading: heading[0] + heading[1] * self.width for heading in CART_HEADINGS.values()}
+        self.headings = {step: heading for heading, step in self.steps.items()}
+        self.segments = {}
+        self.alive = [True] * len(starts)
+        self.next_turns = [TURN_LEFT] * len(starts)
+        self.pieces = [None] * len(starts)
+        self.pieces_by_segment = {}
+        self.node_visits = {}
+        self.visit_ticks = []
+        self.events = []
+        self.tick = 0
+        for cart, (square, heading) in enumerate(starts):
+            step = self.steps[heading]
+            node, distance = self.segment(square, step)
+            back_node, _ = self.segment(square, -step)
+            self.start_piece(Piece(cart, square, step, 0, 0, distance - 1), back_node, node)
+
+    def segment(self, square: int, step: int) -> tuple[int, int]:
+        """The next node going `step` from `square`, and how far away it is."""
+        key = (square, step)
+        if key not in self.segments:
+            distance = 1
+            while self.tiles[square + step * distance] not in NODE_TILES:
+                if self.tiles[square + step * distance] == ' ':
+                    raise ValueError(f'Track runs out going {self.headings[step]} from {self.point(square)}')
+                distance += 1
+            self.segments[key] = (square + step * distance, distance)
+        return self.segments[key]
+
+    def point(self, square: int) -> str:
+        y, x = divmod(square, self.width)
+        return f'{x},{y}'
+
+    def start_piece(self, piece: Piece, from_node: int, to_node: int):
+        self.pieces[piece.cart] = piece
+        arrival = piece.last_tick + 1
+        self.visit_node(piece.cart, to_node, arrival, to_node - piece.step)
+        heapq.heappush(self.events, (arrival, -1, piece.cart, to_node, piece.step))
+
+        if piece.first_tick > piece.last_tick:
+            return  # the nodes are next to each other
+        key = (min(from_node, to_node), max(from_node, to_node))
+        on_segment = self.pieces_by_segment.get(key)
+        if on_segment is None:
+            self.pieces_by_segment[key] = [piece]
+            return
+        on_segment[:] = [other for other in on_segment
+                         if self.alive[other.cart] and other.last_tick >= piece.start_tick - 1]
+        for other in on_segment:
+            crash = piece_crash(piece, other)
+            if crash:
+                tick, mover_start, square = crash
+                heapq.heappush(self.events, (tick, mover_start, piece.cart, other.cart, square))
+        on_segment.append(piece)
+
+    def visit_node(self, cart: int, node: int, tick: int, previous: int):
+        """Records that `cart` moves onto `node` (from `previous`) on `tick`, checking for crashes there."""
+        for other_tick in (tick - 1, tick, tick + 1):
+            visits = self.node_visits.get(other_tick)
+            if not visits or node not in visits:
+                continue
+            for other, other_previous in visits[node]:
+                if not self.alive[other]:
+                    continue
+                if other_tick == tick:
+                    # whichever moves second crashes
+                    crash = (tick, max(previous, other_previous))
+                elif other_tick == tick - 1:
+                    # the other cart is still on the node until it moves this tick
+                    crash = (tick, previous) if previous < node else None
+                else:
+                    crash = (other_tick, other_previous) if other_previous < node else None
+                if crash:
+                    heapq.heappush(self.events, (*crash, cart, other, node))
+        if tick not in self.node_visits:
+            self.node_visits[tick] = {}
+            heapq.heappush(self.visit_ticks, tick)
+        self.node_visits[tick].setdefault(node, []).append((cart, previous))
+
+    def arrive(self, cart: int, node: int, step: int):
+        """Turns a cart that has just moved onto `node` and sends it down the next segment."""
+        tile = self.tiles[node]
+        heading = self.headings[step]
+        if tile == '+':
+            heading = INTERSECTION_TURNS[self.next_turns[cart]][heading]
+            self.next_turns[cart] = (self.next_turns[cart] + 1) % 3
+        else:
+            heading = CURVES[tile][heading]
+        step = self.steps[heading]
+        next_node, distance = self.segment(node, step)
+        piece = Piece(cart, node, step, self.tick, self.tick + 1, self.tick + distance - 1)
+        self.start_piece(piece, node, next_node)
+
+    def run(self, max_ticks: Optional[int] = None) -> tuple[Optional[str], Optional[str]]:
+        """
+        Returns where the first crash happens, and where the last cart is at
+        the end of the tick it becomes the only one left (None if that doesn't
+        happen within `max_ticks`).
+        """
+        first_crash = None
+        remaining = len(self.alive)
+        while self.events:
+            tick, mover_start, cart, *payload = heapq.heappop(self.events)
+            if max_ticks is not None and tick > max_ticks:
+                break
+            if tick != self.tick:
+                # new arrivals are all after this tick, so older visits can't meet them
+                while self.visit_ticks and self.visit_ticks[0] < tick - 1:
+                    del self.node_visits[heapq.heappop(self.visit_ticks)]
+                self.tick = tick
+            if mover_start < 0:
+                if self.alive[cart]:
+                    self.arrive(cart, *payload)
+                continue
+
+            other, square = payload
+            if not (self.alive[cart] and self.alive[other]):
+                continue
+            self.alive[cart] = self.alive[other] = False
+            remaining -= 2
+            if first_crash is None:
+                first_crash = self.point(square)
+            if remaining == 1:
+                last = self.alive.index(True)
+                return first_crash, self.point(self.pieces[last].position(self.tick))
+            if remaining == 0:
+                break
+        return first_crash, None
+
+
+def piece_crash(piece: Piece, other: Piece) -> Optional[tuple[int, int, int]]:
+    """
+    The first crash between two carts strictly inside a segment they're both
+    on, as (tick, square the moving cart started the tick on, square of the
+    crash). A cart crashes by moving onto another cart's square, either
+    where the other one also ends up, or before the other one moves off it.
+    """
+    crashes = []
+    # on the same square at the end of a tick: whichever moves second crashes
+    tick = meeting_tick(piece, other, 0, max(piece.first_tick, other.first_tick, 1),
+                        min(piece.last_tick, other.last_tick))
+    if tick is not None:
+        crashes.append((tick, max(piece.position(tick - 1), other.position(tick - 1)), piece.position(tick)))
+    # moving onto where the other cart was at the end of the previous tick, before it moves
+    for mover, stayer in ((piece, other), (other, piece)):
+        tick = meeting_tick(mover, stayer, 1, max(mover.first_tick, stayer.first_tick + 1, 1),
+                            min(mover.last_tick, stayer.last_tick + 1))
+        if tick is not None and mover.position(tick - 1) < stayer.position(tick - 1):
+            crashes.append((tick, mover.position(tick - 1), mover.position(tick)))
+    return min(crashes) if crashes else None
+
+
+def meeting_tick(piece: Piece, other: Piece, delay: int, low: int, high: int) -> Optional[int]:
+    """
+    The first tick from `low` to `high` where `piece` is on the square `other`
+    was on `delay` ticks before. Both move along the same line at the same
+    speed, so that's either true at every tick or at most one.
+    """
+    if low > high:
+        return None
+    offset = (piece.start - piece.step * piece.start_tick) - \
+        (other.start - other.step * (other.start_tick + delay))
+    if piece.step == other.step:
+        return low if offset == 0 else None
+    # offset + (piece.step - other.step) * tick == 0
+    tick, remainder = divmod(offset, other.step - piece.step)
+    return tick if remainder == 0 and low <= tick <= high else None
+
+
+def random_track(loops: int, carts: int, spacing=2, seed=0) -> list[str]:
+    """
+    A map of overlapping rectangular loops. Every side gets a row or column
+    to itself, so loops only ever cross at intersections and never share
+    track; `spacing` is the average gap between those rows and columns.
+    """
+    rng = random.Random(seed)
+    size = loops * 2 * spacing
+    xs = rng.sample(range(size), loops * 2)
+    ys = rng.sample(range(size), loops * 2)
+    grid = [[' '] * size for _ in range(size)]
+    for i in range(loops):
+        left, right = sorted(xs[2 * i:2 * i + 2])
+        top, bottom = sorted(ys[2 * i:2 * i + 2])
+        for x in range(left + 1, right):
+            for y in (top, bottom):
+                grid[y][x] = '+' if grid[y][x] == '|' else '-'
+        for y in range(top + 1, bottom):
+            for x in (left, right):
+                grid[y][x] = '+' if grid[y][x] == '-' else '|'
+        grid[top][left] = grid[bottom][right] = '/'
+        grid[top][right] = grid[bottom][left] = '\\'
+    straights = [(x, y) for y, row in enumerate(grid) for x, tile in enumerate(row) if tile in '-|']
+    for x, y in rng.sample(straights, carts):
+        grid[y][x] = rng.choice('<>' if grid[y][x] == '-' else '^v')
+    return [''.join(row) for row in grid]
+
+
+def benchmark():
+    for loops, cart_count, spacing in ((50, 101, 10), (200, 1001, 10), (100, 5001, 20)):
+        grid = random_track(loops, cart_count, spacing)
+        print(f'--- {loops} loops on a {len(grid)}x{len(grid)} map, {cart_count} carts ---')
+        start = time.perf_counter()
+        simulator = CartSimulator(grid)
+        first_crash, last_cart = simulator.run()
+        print(f'segments: {first_crash} {last_cart} after {simulator.tick} ticks, '
+              f'in {time.perf_counter() - start:.2f}s')
+
+        if cart_count > 1001:
+            continue  # takes far too long one tick at a time
+        carts: dict[Point, Cart] = {}
+        for y, row in enumerate(grid):
+            for x, tile in enumerate(row):
+                if tile in CART_HEADINGS:
+                    cart = Cart(x, y, tile)
+                    carts[cart.position] = cart
+        tracks = [row.translate(CART_TRACKS) for row in grid]
+        start = time.perf_counter()
+        run_simulation(tracks, carts)
+        print(f'ticks: in {time.perf_counter() - start:.2f}s')
+
+
 if __name__ == '__main__':
     main()
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import math
 import time
+from typing import Callable, Iterator
 
 INPUT = '157901'
 
@@ -11,13 +12,18 @@ PRINT = False
 
 
 def main():
+    timed('part 1', part1, INPUT)
+    timed('part 2 (KMP over recipe chunks)', part2, INPUT)
+    timed('part 2 (endswith after every append)', part2_endswith, INPUT)
+
+
+def timed(label: str, solver: Callable[[str], int], target: str):
     start = time.perf_counter()
     try:
-        print(part1(INPUT))
-        print(part2(INPUT))
+        print(f'{label}: {solver(target)}')
     finally:
         end = time.perf_counter()
-        print(f'Elapsed time: {end - start}s')
+        print(f'    elapsed time: {end - start:.3f}s')
 
 
 def part1(target: str):
@@ -38,7 +44,7 @@ def part1(target: str):
     return int(''.join(str(d) for d in state[count:count + 10]))
 
 
-def part2(target: str):
+def part2_endswith(target: str):
     state = bytearray([3, 7])
     i = 0
     j = 1
@@ -71,5 +77,108 @@ def part2(target: str):
     return len(state) - target_len
 
 
+def part2(target: str):
+    matcher = KmpMatcher(bytes(int(c) for c in target))
+    for chunk in recipe_chunks():
+        match_start = matcher.feed_chunk(chunk)
+        if match_start >= 0:
+            return match_start
+
+
+def recipe_chunks(chunk_size: int = 1 << 16) -> Iterator[bytes]:
+    """
+    Generates the scoreboard in chunks of roughly `chunk_size` recipes, written
+    into a preallocated buffer that doubles when it fills up.
+    """
+    scores = bytearray(1 << 20)
+    scores[0] = 3
+    scores[1] = 7
+    size = 2
+    yield bytes(scores[:size])
+
+    i = 0
+    j = 1
+    while True:
+        chunk_start = size
+        chunk_end = size + chunk_size
+        # a step can add two recipes, so leave room for one past the end
+        while len(scores) < chunk_end + 1:
+            scores.extend(bytes(len(scores)))
+
+        while size < chunk_end:
+            score1 = scores[i]
+            score2 = scores[j]
+            next_num = score1 + score2
+            if next_num >= 10:
+                scores[size] = 1
+                scores[size + 1] = next_num - 10
+                size += 2
+            else:
+                scores[size] = next_num
+                size += 1
+            # the indexes move at most 10 places, so they rarely need wrapping
+            i += 1 + score1
+            if i >= size:
+                i %= size
+            j += 1 + score2
+            if j >= size:
+                j %= size
+
+        yield bytes(scores[chunk_start:size])
+
+
+class KmpMatcher:
+    """
+    Knuth-Morris-Pratt automaton over the digits 0-9, fed one digit (or one
+    chunk of digits) at a time. `transitions[state * 10 + digit]` is the next
+    state, where the state is the length of the pattern prefix matched so far.
+    """
+    pattern: bytes
+    transitions: list[int]
+    state: int
+    position: int
+
+    def __init__(self, pattern: bytes):
+        self.pattern = pattern
+        self.state = 0
+        self.position = 0
+
+        m = len(pattern)
+        transitions = [0] * ((m + 1) * 10)
+        transitions[pattern[0]] = 1
+        # fallback is the state we'd be in had we started matching one digit later
+        fallback = 0
+        for state in range(1, m + 1):
+            transitions[state * 10:state * 10 + 10] = transitions[fallback * 10:fallback * 10 + 10]
+            if state < m:
+                transitions[state * 10 + pattern[state]] = state + 1
+                fallback = transitions[fallback * 10 + pattern[state]]
+        self.transitions = transitions
+
+    def feed(self, digit: int) -> bool:
+        """Advances by one digit and reports whether the pattern ends here."""
+        self.state = self.transitions[self.state * 10 + digit]
+        self.position += 1
+        return self.state == len(self.pattern)
+
+    def feed_chunk(self, digits: bytes) -> int:
+        """
+        Advances over `digits`, stopping at the first complete match. Returns the
+        position of the match start within everything fed so far, or -1.
+        """
+        transitions = self.transitions
+        m = len(self.pattern)
+        state = self.state
+        for offset, digit in enumerate(digits):
+            state = transitions[state * 10 + digit]
+            if state == m:
+                self.state = state
+                self.position += offset + 1
+                return self.position - m
+        self.state = state
+        self.position += len(digits)
+        return -1
+
+
 if __name__ == '__main__':
     main()
@@ -3,7 +3,7 @@ from __future__ import annotations
 import sys
 from collections import namedtuple, deque
 from copy import deepcopy
-from typing import Union
+from typing import NamedTuple, Optional, Union
 
 Point = namedtuple('Point', ['x', 'y'])
 DEBUG = False
@@ -46,10 +46,23 @@ UnitsBySide = dict[str, dict[int, Unit]]
 
 def main():
     with open(sys.argv[1]) as f:
-        grid: Grid = [
-            list(line.strip())
-            for line in f.readlines()
-        ]
+        lines = [line.strip() for line in f.readlines()]
+
+    # part 1
+    print(Combat(lines).run().outcome)
+
+    # part 2
+    elf_attack_power, result, simulations = find_elf_attack_power(lines)
+    print(result.outcome)
+    print(f'    elf attack power {elf_attack_power}, found in {simulations} simulations')
+
+    if len(sys.argv) > 2 and sys.argv[2] == 'objects':
+        main_objects(lines)
+
+
+def main_objects(lines: list[str]):
+    """The original version, with Unit objects in the grid and a linear attack power scan."""
+    grid: Grid = [list(line) for line in lines]
 
     # part 1
     round_number, units_by_side = run_simulation(deepcopy(grid))
@@ -198,5 +211,202 @@ class CombatFinished(Exception):
     pass
 
 
+WALL = -2
+OPEN = -1
+
+ELF = 0
+GOBLIN = 1
+
+STARTING_HP = 200
+GOBLIN_ATTACK_POWER = 3
+
+
+class CombatResult(NamedTuple):
+    rounds: int
+    remaining_hp: int
+
+    @property
+    def outcome(self) -> int:
+        return self.rounds * self.remaining_hp
+
+
+class Combat:
+    """
+    Flat-array version of the fight. Squares are indexed by `y * width + x`,
+    so reading order is plain integer order, and `cells` holds WALL, OPEN or
+    the index of the unit standing there. Units are columns in the parallel
+    `positions`, `hps` and `sides` lists. The map must be walled all the way
+    round (as every puzzle input is), so neighbours never need bounds checks.
+    """
+    width: int
+    cells: list[int]
+    positions: list[int]
+    hps: list[int]
+    sides: list[int]
+    attack_powers: tuple[int, int]
+    side_counts: list[int]
+    offsets: tuple[int, int, int, int]
+
+    def __init__(self, lines: list[str], elf_attack_power=GOBLIN_ATTACK_POWER):
+        self.width = len(lines[0])
+        self.cells = []
+        self.positions = []
+        self.hps = []
+        self.sides = []
+        self.side_counts = [0, 0]
+        for line in lines:
+            for char in line:
+                if char == '#':
+                    self.cells.append(WALL)
+                elif char == '.':
+                    self.cells.append(OPEN)
+                else:
+                    side = ELF if char == 'E' else GOBLIN
+                    self.cells.append(len(self.positions))
+                    self.positions.append(len(self.cells) - 1)
+                    self.hps.append(STARTING_HP)
+                    self.sides.append(side)
+                    self.side_counts[side] += 1
+        self.attack_powers = (elf_attack_power, GOBLIN_ATTACK_POWER)
+        # up, left, right, down: reading order
+        self.offsets = (-self.width, -1, 1, self.width)
+
+    def run(self, stop_on_elf_death=False) -> Optional[CombatResult]:
+        """
+        Fights to the end. With `stop_on_elf_death`, gives up and returns None
+        as soon as any elf dies.
+        """
+        cells, positions, hps, sides = self.cells, self.positions, self.hps, self.sides
+        rounds = 0
+        while True:
+            turn_order = sorted((unit for unit, hp in enumerate(hps) if hp > 0), key=positions.__getitem__)
+            for unit in turn_order:
+                if hps[unit] <= 0:
+                    continue
+                side = sides[unit]
+                if not self.side_counts[1 - side]:
+                    return CombatResult(rounds, sum(hp for hp in hps if hp > 0))
+
+                target = self.adjacent_enemy(unit)
+                if target is None:
+                    step = self.next_step(unit)
+                    if step is None:
+                        continue
+                    cells[positions[unit]] = OPEN
+                    cells[step] = unit
+                    positions[unit] = step
+                    target = self.adjacent_enemy(unit)
+                if target is None:
+                    continue
+
+                hps[target] -= self.attack_powers[side]
+                if hps[target] <= 0:
+                    cells[positions[target]] = OPEN
+                    self.side_counts[sides[target]] -= 1
+                    if stop_on_elf_death and sides[target] == ELF:
+                        return None
+            rounds += 1
+
+    def adjacent_enemy(self, unit: int) -> Optional[int]:
+        """The adjacent enemy with the fewest hit points, ties going to reading order."""
+        cells, hps, sides = self.cells, self.hps, self.sides
+        position = self.positions[unit]
+        side = sides[unit]
+        target = None
+        for offset in self.offsets:
+            other = cells[position + offset]
+            if other >= 0 and sides[other] != side and (target is None or hps[other] < hps[target]):
+                target = other
+        return target
+
+    def next_step(self, unit: int) -> Optional[int]:
+        """
+        The square `unit` should step to, or None if it can't reach any enemy.
+
+        This is one multi-source BFS outwards from every open square next to an
+        enemy, stopping at the first layer that touches the unit. Each square
+        in the field gets the key `distance * area + source`, where source is
+        the nearest in-range square (the first in reading order among equally
+        near ones), so comparing keys picks the nearest destination, breaks
+        ties by reading order, and a neighbour of the unit with the smallest
+        key is exactly a first step along a shortest path to it. Among such
+        neighbours the first in reading order wins, as the rules require.
+        """
+        cells, offsets = self.cells, self.offsets
+        area = len(cells)
+        position = self.positions[unit]
+        enemy_side = 1 - self.sides[unit]
+
+        field = [-1] * area
+        frontier = []
+        for other, other_position in enumerate(self.positions):
+            if self.hps[other] > 0 and self.sides[other] == enemy_side:
+                for offset in offsets:
+                    square = other_position + offset
+                    if cells[square] == OPEN and field[square] < 0:
+                        field[square] = square
+                        frontier.append(square)
+
+        neighbours = [position + offset for offset in offsets if cells[position + offset] == OPEN]
+        while frontier and all(field[square] < 0 for square in neighbours):
+            next_frontier = []
+            for square in frontier:
+                # one step further from the same source
+                key = field[square] + area
+                for offset in offsets:
+                    neighbour = square + offset
+                    if cells[neighbour] != OPEN:
+                        continue
+                    if field[neighbour] < 0:
+                        field[neighbour] = key
+                        next_frontier.append(neighbour)
+                    elif key < field[neighbour]:
+                        # reached again in the same layer from a better source
+                        field[neighbour] = key
+            frontier = next_frontier
+
+        best = None
+        for square in neighbours:
+            if field[square] >= 0 and (best is None or field[square] < field[best]):
+                best = square
+        return best
+
+
+def find_elf_attack_power(lines: list[str]) -> tuple[int, CombatResult, int]:
+    """
+    Finds the smallest elf attack power where no elf dies, assuming more
+    attack power never costs the elves. Gallops up from 4 (doubling the
+    step each time) until the elves win cleanly, then bisects back between
+    the last power that lost an elf and the first that didn't. Every fight
+    stops at the first elf death. Also returns how many fights it took.
+    """
+    simulations = 0
+
+    def fight(power: int) -> Optional[CombatResult]:
+        nonlocal simulations
+        simulations += 1
+        return Combat(lines, power).run(stop_on_elf_death=True)
+
+    losing_power = GOBLIN_ATTACK_POWER
+    power = losing_power + 1
+    step = 1
+    result = fight(power)
+    while result is None:
+        losing_power = power
+        power += step
+        step *= 2
+        result = fight(power)
+
+    while power - losing_power > 1:
+        middle = (losing_power + power) // 2
+        middle_result = fight(middle)
+        if middle_result is None:
+            losing_power = middle
+        else:
+            power, result = middle, middle_result
+
+    return power, result, simulations
+
+
 if __name__ == '__main__':
     main()
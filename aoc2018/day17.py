@@ -1,8 +1,11 @@
+import random
 import re
 import sys
 from typing import NamedTuple, Optional
 from copy import copy
 
+import numpy as np
+
 
 class Point(NamedTuple):
     x: int
@@ -30,6 +33,11 @@ x=501, y=3..7
 PARSER = re.compile(r'([xy])=(\d+), ([xy])=(\d+)\.\.(\d+)')
 
 def main():
+    if sys.argv[1] == '--check':
+        # random scans instead of an input, e.g. `day17.py --check`
+        check(*map(int, sys.argv[2:]))
+        return
+
     grid: dict[Point, str] = {}
     with open(sys.argv[1]) as f:
         for line in f.readlines():
@@ -50,12 +58,16 @@ def main():
     max_x = max(p.x for p in grid.keys())
 
     starting_point = Point(x=500, y=0)
-    grid[starting_point] = '+'
     state = State(grid, min_x, max_x, min_y, max_y)
-    iterate(state, [starting_point], verbose=False)
+    water = WaterGrid(state)
+    water.fill(starting_point)
 
-    print(sum(1 for p, v in state.grid.items() if min_y <= p.y <= max_y and v in WATER_TILES))
-    print(sum(1 for p, v in state.grid.items() if min_y <= p.y <= max_y and v == '~'))
+    print(water.count_water())
+    print(water.count_settled())
+
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], 'w') as f:
+            f.write(water.render())
 
 
 WATER_TILES = {'|', '~'}
@@ -136,5 +148,211 @@ def iterate(state: State, current_flow_points: list[Point], verbose=True):
         print(state)
 
 
+SAND = 0
+CLAY = 1
+FLOWING = 2
+SETTLED = 3
+
+RENDERED_TILES = '.#|~'
+
+
+class WaterGrid:
+    """
+    Dense version of the scan: one uint8 per square from x = min_x - 1 to
+    max_x + 1 (water can spill just past the outermost clay) and y = 0 to max_y.
+
+    Water is tracked as a work stack of streams. Each stream falls from a
+    square that's already wet, then fills its landing spot one whole row at a
+    time: a row walled in on both sides settles and the stream rises to the row
+    above, otherwise the row is left flowing and each open end starts a new
+    stream, unless that end already has one. When a stream's pool rises up to
+    the row it spilled from, that row now has support, so its parent stream
+    re-spreads it.
+    """
+    grid: np.ndarray
+    x_offset: int
+    min_y: int
+    max_y: int
+
+    def __init__(self, state: State):
+        self.x_offset = state.min_x - 1
+        self.min_y = state.min_y
+        self.max_y = state.max_y
+        self.grid = np.zeros((state.max_y + 1, state.max_x - state.min_x + 3), dtype=np.uint8)
+        for point, tile in state.grid.items():
+            if tile == '#':
+                self.grid[point.y, point.x - self.x_offset] = CLAY
+
+    def fill(self, source: Point):
+        grid = self.grid
+        # streams[i] = (column, row it starts falling from, index of the parent stream)
+        streams: list[tuple[int, int, Optional[int]]] = [(source.x - self.x_offset, source.y, None)]
+        # (column, row) of every stream so far, so spreading a row again doesn't start a second one off the same end
+        started = {streams[0][:2]}
+        # (stream index, row to spread, or None to start by falling)
+        work: list[tuple[int, Optional[int]]] = [(0, None)]
+        while work:
+            stream_index, level = work.pop()
+            x, top, parent = streams[stream_index]
+            if level is None:
+                level = self.fall(x, top)
+                if level is None:
+                    continue
+                if level == top:
+                    # another stream's pool has come up under this end since it was started, and took care of it
+                    continue
+
+            while True:
+                left, left_open = self.scan(level, x, -1)
+                right, right_open = self.scan(level, x, 1)
+                if left_open or right_open:
+                    grid[level, left:right + 1] = FLOWING
+                    for end, is_open in ((left, left_open), (right, right_open)):
+                        if is_open and (end, level) not in started:
+                            started.add((end, level))
+                            streams.append((end, level, stream_index))
+                            work.append((len(streams) - 1, None))
+                    break
+
+                grid[level, left:right + 1] = SETTLED
+                level -= 1
+                if level <= top:
+                    if parent is not None:
+                        work.append((parent, level))
+                    break
+
+    def fall(self, x: int, top: int) -> Optional[int]:
+        """
+        Marks the stream falling from (x, top) and returns the row where it lands
+        on clay or settled water, or None if it joins other flowing water or
+        runs off the bottom.
+        """
+        column = self.grid[top + 1:, x]
+        blocked = column != SAND
+        if not blocked.any():
+            column[:] = FLOWING
+            return None
+        distance = int(np.argmax(blocked))
+        column[:distance] = FLOWING
+        if column[distance] == FLOWING:
+            return None
+        return top + distance
+
+    def scan(self, level: int, x: int, direction: int) -> tuple[int, bool]:
+        """
+        Looks along row `level` from x in `direction`, for either a clay wall or a
+        square without clay or settled water underneath. Returns the last square
+        water reaches that way and whether it spills over the edge there.
+        """
+        if direction < 0:
+            row = self.grid[level, x::-1]
+            below = self.grid[level + 1, x::-1]
+        else:
+            row = self.grid[level, x:]
+            below = self.grid[level + 1, x:]
+        wall = row == CLAY
+        unsupported = (below == SAND) | (below == FLOWING)
+        distance = int(np.argmax(wall | unsupported))
+        if wall[distance]:
+            return x + direction * (distance - 1), False
+        return x + direction * distance, True
+
+    def count_water(self) -> int:
+        return int(np.count_nonzero(self.grid[self.min_y:] >= FLOWING))
+
+    def count_settled(self) -> int:
+        return int(np.count_nonzero(self.grid[self.min_y:] == SETTLED))
+
+    def render(self) -> str:
+        tiles = np.array(list(RENDERED_TILES))
+        return '\n'.join(''.join(row) for row in tiles[self.grid])
+
+
+def fixed_point_fill(water: WaterGrid, source: Point):
+    """
+    Slow reference for WaterGrid.fill: applies the local rules to every square
+    until nothing changes. Flowing water falls into sand below it, spreads
+    sideways into sand while it has clay or settled water underneath, and a
+    run of flowing water with support all along and clay at both ends settles.
+    """
+    grid = water.grid
+    height, width = grid.shape
+    grid[source.y + 1, source.x - water.x_offset] = FLOWING
+    changed = True
+    while changed:
+        changed = False
+        for y in range(height - 1):
+            for x in range(width):
+                if grid[y, x] != FLOWING:
+                    continue
+                if grid[y + 1, x] == SAND:
+                    grid[y + 1, x] = FLOWING
+                    changed = True
+                elif grid[y + 1, x] in (CLAY, SETTLED):
+                    for side in (x - 1, x + 1):
+                        if 0 <= side < width and grid[y, side] == SAND:
+                            grid[y, side] = FLOWING
+                            changed = True
+        for y in range(height - 1):
+            x = 0
+            while x < width:
+                if grid[y, x] != FLOWING:
+                    x += 1
+                    continue
+                end = x
+                while end < width and grid[y, end] >= FLOWING and grid[y + 1, end] in (CLAY, SETTLED):
+                    end += 1
+                if end < width and grid[y, end] == CLAY and x > 0 and grid[y, x - 1] == CLAY:
+                    grid[y, x:end] = SETTLED
+                    changed = True
+                x = end + 1
+
+
+def random_scan(rng: random.Random, width: int, height: int, veins: int) -> State:
+    """
+    Clay veins like the puzzle input's, mostly open-topped basins of random
+    sizes, some of them overlapping, plus a few closed boxes and loose
+    horizontal and vertical lines.
+    """
+    grid: dict[Point, str] = {}
+    for _ in range(veins):
+        left = rng.randrange(500 - width // 2, 500 + width // 2)
+        right = left + rng.randrange(1, 20)
+        top = rng.randrange(2, height - 1)
+        bottom = min(top + rng.randrange(0, 10), height)
+        shape = rng.random()
+        points = [Point(x, bottom) for x in range(left, right + 1)]
+        if shape < 0.5:
+            points += [Point(x, y) for x in (left, right) for y in range(top, bottom)]
+        elif shape < 0.6:
+            points += [Point(x, y) for x in (left, right) for y in range(top, bottom)]
+            points += [Point(x, top) for x in range(left, right + 1)]
+        elif shape < 0.8:
+            points = [Point(left, y) for y in range(top, bottom + 1)]
+        grid.update((point, '#') for point in points)
+    # wide enough for the spring even when no clay is under it
+    min_x = min(min(p.x for p in grid), 500)
+    max_x = max(max(p.x for p in grid), 500)
+    return State(grid, min_x, max_x, min(p.y for p in grid), max(p.y for p in grid))
+
+
+def check(rounds=3000, seed=0):
+    """Fills random scans both ways and compares the grids square by square"""
+    rng = random.Random(seed)
+    for round_number in range(rounds):
+        state = random_scan(rng, rng.randrange(6, 30), rng.randrange(8, 30), rng.randrange(3, 40))
+        source = Point(500, 0)
+        water = WaterGrid(state)
+        water.fill(source)
+        expected = WaterGrid(state)
+        fixed_point_fill(expected, source)
+        if not np.array_equal(water.grid, expected.grid):
+            raise AssertionError(
+                f'round {round_number}: {water.count_water(), water.count_settled()} water, '
+                f'expected {expected.count_water(), expected.count_settled()}\n'
+                f'{water.render()}\n\nexpected:\n{expected.render()}')
+    print(f'{rounds} random scans filled the same as the fixed point')
+
+
 if __name__ == '__main__':
     main()
@@ -5,6 +5,7 @@ import sys
 from typing import NamedTuple, Iterable
 
 from aoc2018.day16 import OperationMethods
+from aoc2018.elfcode import Program
 
 
 class Instruction(NamedTuple):
@@ -32,21 +33,21 @@ def main():
 
     ip_index, instructions = parse_lines(lines)
 
+    # part 1: small enough to simply run, with the divisor-testing inner loop fast-forwarded
     registers = [0] * 6
+    program = Program(instructions, ip_index)
+    for _ in program.run(registers, skip_loops=True):
+        pass
+    print(registers[0])
 
-    # slow way
-    # execute(instructions, ip_index, registers, verbose=False)
-    # print(registers)
-
-    # turns out that this program essentially iterates two nested for loops
-    # from 1 to reg4 and adds to reg0 if the two loop variables multiply to reg4.
-    # so essentially reg0 will have the result of the sum of all factors of reg4.
-    reg4 = 4 * 19 * 11 + (5 * 22 + 12)  # interpreted ops by hand
-    print(sum(factors(reg4)))
-
-    # part 2
-    reg4 += (27 * 28 + 29) * 30 * 14 * 32  # interpreted ops by hand!
-    print(sum(factors(reg4)))
+    # part 2: the program essentially iterates two nested for loops from 1 to reg4 and adds to reg0 if the two
+    # loop variables multiply to reg4, so reg0 ends up with the sum of all factors of reg4. Even with the inner
+    # loop skipped, the outer loop runs reg4 times, so only run the setup code (which jumps back to ip 1 once
+    # reg4 is ready) and factor reg4 directly.
+    registers = [1, 0, 0, 0, 0, 0]
+    program = Program(instructions, ip_index, breakpoints=[1])
+    next(program.run(registers))
+    print(sum(factors(registers[4])))
 
 
 def factors(n: int) -> Iterable[int]:
@@ -56,10 +57,11 @@ def factors(n: int) -> Iterable[int]:
             yield n // i
 
 
-def execute(instructions: list[Instruction], ip_index: int, registers: list[int], verbose=False):
+def execute(instructions: list[Instruction], ip_index: int, registers: list[int], verbose=False,
+            max_steps: int | None = None):
     ip = 0
     step = 0
-    while 0 <= ip < len(instructions):
+    while 0 <= ip < len(instructions) and (max_steps is None or step < max_steps):
         step += 1
         op = instructions[ip]
         registers[ip_index] = ip
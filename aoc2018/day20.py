@@ -1,7 +1,11 @@
 from __future__ import annotations
+import random
+import re
 import sys
+import time
+from array import array
 from collections import deque
-from typing import NamedTuple, Literal, Iterable, Optional
+from typing import Callable, NamedTuple, Literal, Iterable, Optional, Union
 
 FORWARD_DIRECTIONS = [
     (0, 1),
@@ -60,7 +64,19 @@ def main():
     with open(sys.argv[1]) as f:
         regex = f.read().strip()
 
-    solve(regex)
+    rooms = RoomMap.from_route(regex)
+    layer_sizes = rooms.layer_sizes()
+
+    # part 1
+    print(len(layer_sizes) - 1)
+
+    # part 2
+    print(sum(layer_sizes[1000:]))
+
+    print(f'    {rooms}')
+
+    if len(sys.argv) > 2 and sys.argv[2] == 'benchmark':
+        benchmark()
 
 
 def solve(regex: str):
@@ -103,5 +119,230 @@ def solve(regex: str):
     print(sum(1 for n in grid.values() if n.distance >= 1000))
 
 
+# door bits stored for each room
+DOOR_BITS = {'N': 1, 'E': 2, 'S': 4, 'W': 8}
+OPPOSITE_DOOR_BITS = {direction: DOOR_BITS[opposite] for direction, opposite in OPPOSITES.items()}
+
+TOKEN_PATTERN = re.compile(r'[NESW]+|[(|)]')
+
+# a set of rooms, or a list of them (nested to any depth) that hasn't been merged yet
+Positions = Union[set[int], list]
+
+
+class RoomMap:
+    """
+    The rooms as a flat bytearray of door bitmasks (DOOR_BITS), one per room,
+    indexed by `(y + size // 2) * size + (x + size // 2)`. The map starts small
+    and doubles its size whenever a route might walk off the edge.
+    """
+    size: int
+    doors: bytearray
+    steps: dict[str, int]
+    room_count: int
+    door_count: int
+    # the most positions the route has been at at once
+    peak_positions: int
+
+    def __init__(self, size=64):
+        self.resize(size)
+        self.room_count = 1
+        self.door_count = 0
+        self.peak_positions = 1
+
+    def resize(self, size: int):
+        self.size = size
+        self.doors = bytearray(size * size)
+        self.steps = {'N': -size, 'E': 1, 'S': size, 'W': -1}
+
+    @property
+    def origin(self) -> int:
+        return self.pack(0, 0)
+
+    def pack(self, x: int, y: int) -> int:
+        return (y + self.size // 2) * self.size + x + self.size // 2
+
+    def unpack(self, room: int) -> tuple[int, int]:
+        y, x = divmod(room, self.size)
+        return x - self.size // 2, y - self.size // 2
+
+    @staticmethod
+    def from_route(regex: str) -> RoomMap:
+        """
+        Follows every path the regex describes in a single pass, moving a
+        whole set of current positions per token so that a room several
+        branches lead to is only walked from once.
+
+        A group's branches can end in a lot of places, and most of the time
+        (when the group is the last thing in its own branch) nothing is ever
+        walked from them. So at a ')' the branch ends are only collected in
+        a list, and merged into one deduplicated set when something does
+        walk from them.
+        """
+        rooms = RoomMap()
+        current: Positions = {rooms.origin}
+        # (positions at the start of the group, positions its finished branches ended at)
+        stack: list[tuple[set[int], list[Positions]]] = []
+        for token in TOKEN_PATTERN.findall(regex):
+            if token == '(':
+                current = rooms.merge(current)
+                stack.append((current, []))
+            elif token == '|':
+                starts, ends = stack[-1]
+                ends.append(current)
+                current = starts
+            elif token == ')':
+                starts, ends = stack.pop()
+                ends.append(current)
+                current = ends
+            else:
+                current = rooms.merge(current)
+                while not rooms.has_margin(current, len(token)):
+                    move = rooms.grow()
+                    current = {move(room) for room in current}
+                    stack = [({move(room) for room in starts}, [{move(room) for room in rooms.merge(ends)}])
+                             for starts, ends in stack]
+                current = {rooms.walk(room, token) for room in current}
+        return rooms
+
+    def merge(self, positions: Positions) -> set[int]:
+        if isinstance(positions, set):
+            return positions
+        merged = set()
+        pending = [positions]
+        while pending:
+            item = pending.pop()
+            if isinstance(item, set):
+                merged |= item
+            else:
+                pending.extend(item)
+        self.peak_positions = max(self.peak_positions, len(merged))
+        return merged
+
+    def has_margin(self, rooms: Iterable[int], distance: int) -> bool:
+        """Whether every room is more than `distance` rooms from the edge."""
+        size = self.size
+        for room in rooms:
+            y, x = divmod(room, size)
+            if min(x, y, size - 1 - x, size - 1 - y) <= distance:
+                return False
+        return True
+
+    def grow(self) -> Callable[[int], int]:
+        """Doubles the size, keeping the origin in the middle. Returns how to move an old room index."""
+        old_size = self.size
+        old_doors = self.doors
+        self.resize(old_size * 2)
+        shift = old_size // 2
+
+        def move(room: int) -> int:
+            y, x = divmod(room, old_size)
+            return (y + shift) * self.size + x + shift
+
+        for y in range(old_size):
+            start = move(y * old_size)
+            self.doors[start:start + old_size] = old_doors[y * old_size:(y + 1) * old_size]
+        return move
+
+    def walk(self, room: int, route: str) -> int:
+        """Opens the doors along `route` from `room`, returning the room it ends in."""
+        doors, steps = self.doors, self.steps
+        for direction in route:
+            bit = DOOR_BITS[direction]
+            if not doors[room] & bit:
+                doors[room] |= bit
+                self.door_count += 1
+            room += steps[direction]
+            if not doors[room]:
+                self.room_count += 1
+            doors[room] |= OPPOSITE_DOOR_BITS[direction]
+        return room
+
+    def layer_sizes(self) -> list[int]:
+        """How many rooms are at each distance from the origin, by breadth-first search."""
+        doors = self.doors
+        moves = [(DOOR_BITS[direction], step) for direction, step in self.steps.items()]
+        seen = bytearray(len(doors))
+        seen[self.origin] = 1
+        frontier = array('i', [self.origin])
+        layer_sizes = []
+        while frontier:
+            layer_sizes.append(len(frontier))
+            next_frontier = array('i')
+            for room in frontier:
+                mask = doors[room]
+                for bit, step in moves:
+                    if mask & bit and not seen[room + step]:
+                        seen[room + step] = 1
+                        next_frontier.append(room + step)
+            frontier = next_frontier
+        return layer_sizes
+
+    def __repr__(self):
+        return (f'{self.room_count} rooms, {self.door_count} doors, on a {self.size}x{self.size} map, '
+                f'at most {self.peak_positions} positions at once')
+
+
+def random_route(size: int, seed=0) -> str:
+    """
+    The regex for a random size x size maze, made the way the puzzle's seem
+    to be: a spanning tree carved out by a randomized depth-first search,
+    written out from the middle room with a group wherever it branches.
+    """
+    rng = random.Random(seed)
+    moves = {'N': (0, -1), 'E': (1, 0), 'S': (0, 1), 'W': (-1, 0)}
+    start = (size // 2) * size + size // 2
+    children: list[list[tuple[str, int]]] = [[] for _ in range(size * size)]
+    carved = bytearray(size * size)
+    carved[start] = 1
+    stack = [start]
+    while stack:
+        y, x = divmod(stack[-1], size)
+        options = [(direction, (y + dy) * size + x + dx) for direction, (dx, dy) in moves.items()
+                   if 0 <= x + dx < size and 0 <= y + dy < size and not carved[(y + dy) * size + x + dx]]
+        if not options:
+            stack.pop()
+            continue
+        direction, room = rng.choice(options)
+        carved[room] = 1
+        children[stack[-1]].append((direction, room))
+        stack.append(room)
+
+    route = ['^']
+    # rooms still to write out, and the text that goes between them
+    work: list[str | int] = [start]
+    while work:
+        item = work.pop()
+        if isinstance(item, str):
+            route.append(item)
+        elif len(children[item]) == 1:
+            direction, room = children[item][0]
+            route.append(direction)
+            work.append(room)
+        elif children[item]:
+            items: list[str | int] = ['(']
+            for direction, room in children[item]:
+                items += [direction, room, '|']
+            items[-1] = ')'
+            work.extend(reversed(items))
+    route.append('$')
+    return ''.join(route)
+
+
+def benchmark():
+    for size in (100, 300, 1000):
+        regex = random_route(size)
+        print(f'--- {size}x{size} maze, {len(regex)} character route ---')
+        start = time.perf_counter()
+        rooms = RoomMap.from_route(regex)
+        layer_sizes = rooms.layer_sizes()
+        print(f'bitmasks: {len(layer_sizes) - 1} {sum(layer_sizes[1000:])} in {time.perf_counter() - start:.2f}s')
+        print(f'    {rooms}')
+        if size > 300:
+            continue  # a million Node objects is too much
+        start = time.perf_counter()
+        solve(regex)
+        print(f'nodes: in {time.perf_counter() - start:.2f}s')
+
+
 if __name__ == '__main__':
     main()
@@ -1,11 +1,9 @@
 from __future__ import annotations
 
-import math
 import sys
-from typing import NamedTuple, Iterable
 
-from aoc2018.day16 import OperationMethods
-from aoc2018.day19 import Instruction, execute, parse_lines
+from aoc2018.day19 import parse_lines
+from aoc2018.elfcode import Program
 
 
 def main():
@@ -13,10 +11,29 @@ def main():
         lines = [line.strip() for line in f.readlines()]
 
     ip_index, instructions = parse_lines(lines)
-    registers = [0] * 6
 
-    # for exploration only - day21.js has the solution
-    execute(instructions, ip_index, registers, verbose=False)
+    # register 0 is only ever read by the check that halts the program, so watch the value it's compared
+    # against each time the check is about to run
+    check_ip, check = next(
+        (i, instruction) for i, instruction in enumerate(instructions)
+        if instruction.name == 'eqrr' and 0 in (instruction.a, instruction.b)
+    )
+    compared_register = check.b if check.a == 0 else check.a
+
+    registers = [0] * 6
+    program = Program(instructions, ip_index, breakpoints=[check_ip])
+    seen_values: dict[int, None] = {}
+    for _ in program.run(registers, skip_loops=True):
+        value = registers[compared_register]
+        if value in seen_values:
+            break
+        seen_values[value] = None
+
+    values = list(seen_values)
+    # part 1: fewest instructions means halting at the very first check
+    print(values[0])
+    # part 2: most instructions means halting on the last value before they start repeating
+    print(values[-1])
 
 
 if __name__ == '__main__':
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+from array import array
 from math import inf
 import sys
+import time
 from typing import NamedTuple, Optional, Literal
 import heapq
 
@@ -53,9 +55,6 @@ def main():
     target_x, target_y = lines[1].split(': ')[1].split(',')
     target = Point(int(target_x), int(target_y))
 
-    # TEST CASE
-    depth, target = 510, Point(10, 10)
-
     width = target.x + 1
     height = target.y + 1
 
@@ -70,15 +69,37 @@ def main():
     print(sum(sum(risk_levels[y][x] for x in range(width))
               for y in range(height)))
 
-    print(part2(target, risk_levels, height_bound, width_bound))
+    start = time.perf_counter()
+    dijkstra_stats = SearchStats()
+    print(part2(target, risk_levels, height_bound, width_bound, dijkstra_stats))
+    print(f'    {dijkstra_stats} in {time.perf_counter() - start:.3f}s')
+
+    start = time.perf_counter()
+    a_star_stats = SearchStats()
+    print(part2_a_star(target, Cave(depth, target, mod_base), a_star_stats))
+    print(f'    {a_star_stats} in {time.perf_counter() - start:.3f}s')
+
+
+class SearchStats:
+    nodes_expanded: int
+    peak_heap_size: int
 
+    def __init__(self):
+        self.nodes_expanded = 0
+        self.peak_heap_size = 0
 
-def part2(target, risk_levels, height_bound, width_bound):
+    def __repr__(self):
+        return f'{self.nodes_expanded} nodes expanded, peak heap size {self.peak_heap_size}'
+
+
+def part2(target, risk_levels, height_bound, width_bound, stats: Optional[SearchStats] = None):
     start = Point(0, 0)
     heap = [State.create(0, start, TORCH, set(), target)]
     i = 0
     best_result: dict[tuple[Point, Tool], int] = {}
     while heap:
+        if stats:
+            stats.peak_heap_size = max(stats.peak_heap_size, len(heap))
         state = heapq.heappop(heap)
         if i % 100_000 == 0:
             print(f'step {i}, heap size {len(heap)}')
@@ -89,6 +110,8 @@ def part2(target, risk_levels, height_bound, width_bound):
             best_result[result_key] = state.time_taken
         else:
             continue
+        if stats:
+            stats.nodes_expanded += 1
 
         p = state.point
         if p == target:
@@ -127,6 +150,148 @@ def part2(target, risk_levels, height_bound, width_bound):
             try_neighbor(Point(p.x, p.y + 1))
 
 
+class Cave:
+    """
+    Region types, worked out lazily: the cave only grows (by doubling its
+    width or height) when the search first steps past its current edge.
+    Everything is stored in flat arrays indexed by `y * stride + x`.
+    """
+    depth: int
+    target: Point
+    mod_base: int
+    stride: int
+    height: int
+    erosion_levels: array
+    region_types: bytearray
+
+    def __init__(self, depth: int, target: Point, mod_base: int = 20183):
+        self.depth = depth
+        self.target = target
+        self.mod_base = mod_base
+        self.stride = 1
+        while self.stride <= target.x:
+            self.stride *= 2
+        self.height = 0
+        self.erosion_levels = array('I')
+        self.region_types = bytearray()
+        self.add_rows(target.y + 1)
+
+    def erosion_level(self, x: int, y: int, left: int, above: int) -> int:
+        if (x == 0 and y == 0) or (x == self.target.x and y == self.target.y):
+            geologic_index = 0
+        elif y == 0:
+            geologic_index = x * 16807
+        elif x == 0:
+            geologic_index = y * 48271
+        else:
+            geologic_index = left * above
+        return (geologic_index + self.depth) % self.mod_base
+
+    def add_rows(self, count: int):
+        stride = self.stride
+        for y in range(self.height, self.height + count):
+            above_row = (y - 1) * stride
+            left = 0
+            for x in range(stride):
+                above = self.erosion_levels[above_row + x] if y else 0
+                left = self.erosion_level(x, y, left, above)
+                self.erosion_levels.append(left)
+                self.region_types.append(left % 3)
+        self.height += count
+
+    def widen(self):
+        """Doubles the stride, filling in the new columns of every row top to bottom."""
+        old_stride = self.stride
+        stride = old_stride * 2
+        erosion_levels = array('I', bytes(4 * stride * self.height))
+        for y in range(self.height):
+            erosion_levels[y * stride:y * stride + old_stride] = \
+                self.erosion_levels[y * old_stride:(y + 1) * old_stride]
+            left = erosion_levels[y * stride + old_stride - 1]
+            for x in range(old_stride, stride):
+                above = erosion_levels[(y - 1) * stride + x] if y else 0
+                left = self.erosion_level(x, y, left, above)
+                erosion_levels[y * stride + x] = left
+        self.stride = stride
+        self.erosion_levels = erosion_levels
+        self.region_types = bytearray(level % 3 for level in erosion_levels)
+
+
+def part2_a_star(target: Point, cave: Cave, stats: Optional[SearchStats] = None) -> int:
+    """
+    A* over (x, y, tool) states, each packed into one int as
+    `(y * cave.stride + x) * 3 + tool`. The heuristic is the Manhattan distance
+    plus 7 if we aren't holding the torch, which never overestimates since
+    every step costs at least 1 and we must switch to the torch at the end.
+    """
+    def heuristic(x: int, y: int, tool: int) -> int:
+        return abs(target.x - x) + abs(target.y - y) + (0 if tool == TORCH else 7)
+
+    # best known time for every state, indexed like the packed states
+    best_times = array('I', [0xFFFFFFFF]) * (len(cave.region_types) * 3)
+    start_state = TORCH
+    best_times[start_state] = 0
+    heap = [(heuristic(0, 0, TORCH), 0, start_state)]
+    target_state = (target.y * cave.stride + target.x) * 3 + TORCH
+
+    while heap:
+        if stats:
+            stats.peak_heap_size = max(stats.peak_heap_size, len(heap))
+        _, time_taken, state = heapq.heappop(heap)
+        if time_taken > best_times[state]:
+            continue
+        if state == target_state:
+            return time_taken
+        if stats:
+            stats.nodes_expanded += 1
+
+        index, tool = divmod(state, 3)
+        y, x = divmod(index, cave.stride)
+        region_type = cave.region_types[index]
+
+        # the one other tool that's allowed here
+        moves = [(x, y, 3 - region_type - tool, time_taken + 7)]
+        for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            if nx >= 0 and ny >= 0:
+                moves.append((nx, ny, tool, time_taken + 1))
+
+        for nx, ny, new_tool, new_time in moves:
+            if nx >= cave.stride or ny >= cave.height:
+                old_stride = cave.stride
+                if nx >= cave.stride:
+                    cave.widen()
+                else:
+                    cave.add_rows(cave.height)
+                best_times, heap = repack(best_times, heap, old_stride, cave)
+                target_state = (target.y * cave.stride + target.x) * 3 + TORCH
+            new_index = ny * cave.stride + nx
+            if cave.region_types[new_index] == new_tool:
+                continue
+            new_state = new_index * 3 + new_tool
+            if new_time < best_times[new_state]:
+                best_times[new_state] = new_time
+                heapq.heappush(heap, (new_time + heuristic(nx, ny, new_tool), new_time, new_state))
+
+    raise ValueError('Target unreachable')
+
+
+def repack(best_times: array, heap: list[tuple[int, int, int]], old_stride: int,
+           cave: Cave) -> tuple[array, list[tuple[int, int, int]]]:
+    """Moves the search state over to the cave's new size after it grows."""
+    def move(state: int) -> int:
+        index, tool = divmod(state, 3)
+        y, x = divmod(index, old_stride)
+        return (y * cave.stride + x) * 3 + tool
+
+    new_best_times = array('I', [0xFFFFFFFF]) * (len(cave.region_types) * 3)
+    for state, best_time in enumerate(best_times):
+        if best_time != 0xFFFFFFFF:
+            new_best_times[move(state)] = best_time
+    new_heap = [(estimate, time_taken, move(state)) for estimate, time_taken, state in heap]
+    heapq.heapify(new_heap)
+    return new_best_times, new_heap
+
+
 def calculate_risk_levels(target: Point, depth: int, mod_base: int, height_bound: int, width_bound: int):
     geologic_indices: list[list[Optional[int]]] = [
         [None] * width_bound
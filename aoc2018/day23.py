@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import heapq
+import random
 import re
 import sys
+import time
 from typing import NamedTuple, Optional, Literal
 
+import numpy as np
+
 
 class Point3D(NamedTuple):
     x: int
@@ -42,6 +47,141 @@ def main():
     print(sum(1 for n in nanobots
               if manhattan_distance(n.pos, strongest.pos) <= strongest.rad))
 
+    start = time.perf_counter()
+    best = best_position(nanobots)
+    print(manhattan_distance(best.corner, Point3D(0, 0, 0)))
+    print(f'{best.count} bots in range of {best.corner}, found in {time.perf_counter() - start:.3f}s')
+
+    if len(sys.argv) > 2:
+        # benchmark on generated inputs, e.g. `day23.py inputs/day23.txt 1000`
+        for seed in range(5):
+            bots, target = random_nanobots(int(sys.argv[2]), seed)
+            start = time.perf_counter()
+            best = best_position(bots)
+            assert best.corner == target
+            print(f'{len(bots)} random bots: {best.count} in range of {best.corner}, '
+                  f'found in {time.perf_counter() - start:.3f}s')
+
+
+def random_nanobots(count: int, seed: int) -> tuple[list[Nanobot], Point3D]:
+    """
+    Bots shaped like the puzzle input: about half of them just barely reach a
+    hidden target point, most of the rest reach it with room to spare, and a
+    few decoys fall well short.
+    """
+    rng = random.Random(seed)
+    target = Point3D(*(rng.randint(-5 * 10 ** 7, 5 * 10 ** 7) for _ in range(3)))
+    nanobots = []
+    for _ in range(count):
+        pos = Point3D(*(rng.randint(-10 ** 8, 10 ** 8) for _ in range(3)))
+        distance = manhattan_distance(pos, target)
+        kind = rng.random()
+        if kind < 0.5:
+            rad = distance
+        elif kind < 0.98:
+            rad = distance + rng.randint(0, 8 * 10 ** 7)
+        else:
+            rad = max(0, distance - rng.randint(10 ** 8, 16 * 10 ** 7))
+        nanobots.append(Nanobot(pos, rad))
+    return nanobots, target
+
+
+class Box(NamedTuple):
+    # sorts most bots in range first, then closest to the origin, then smallest
+    neg_count: int
+    origin_distance: int
+    size: int
+    # in the rotated coordinates used by best_position until the final answer
+    corner: Point3D
+
+    @property
+    def count(self) -> int:
+        return -self.neg_count
+
+
+def best_position(nanobots: list[Nanobot]) -> Box:
+    """
+    Branch and bound octree search for the point in range of the most
+    nanobots, breaking ties by distance to the origin.
+
+    The search runs in rotated coordinates u1 = x+y+z, u2 = x+y-z, u3 = x-y+z,
+    where a nanobot's range (an octahedron) becomes the cube |ui - ci| <= r
+    intersected with the slab |u1-u2-u3 - c4| <= r (c4 being -x+y+z for the
+    bot). Octree boxes are axis-aligned in u-space, so they hug those ranges
+    much more tightly than boxes in x/y/z would. Only points where u1, u2 and
+    u3 share a parity map back to whole x/y/z coordinates.
+
+    Every box in the queue is scored by the number of bots that reach any part
+    of it, an upper bound for every point inside, and by a lower bound on its
+    distance to the origin (which is max(|u1|, |u2|, |u3|, |u1-u2-u3|)). Once a
+    real point is found, only boxes that could still beat it get split.
+    """
+    positions = np.array([bot.pos for bot in nanobots], dtype=np.int64)
+    radii = np.array([bot.rad for bot in nanobots], dtype=np.int64)
+    x, y, z = positions.T
+    centers = np.stack([x + y + z, x + y - z, x - y + z], axis=1)
+    slab_centers = -x + y + z
+    range_lows = centers - radii[:, None]
+    range_highs = centers + radii[:, None]
+
+    low = range_lows.min(axis=0)
+    size = 1
+    while size < (range_highs.max(axis=0) - low).max() + 1:
+        size *= 2
+
+    def score(corners: np.ndarray, box_size: int) -> list[Box]:
+        # clip every box against every bot's cube, as (boxes, bots, 3) arrays
+        lows = np.maximum(corners[:, None, :], range_lows)
+        highs = np.minimum(corners[:, None, :] + box_size - 1, range_highs)
+        overlaps = (lows <= highs).all(axis=2)
+        # then check the slab against the range of u1-u2-u3 over the clipped box
+        slab_lows = lows[:, :, 0] - highs[:, :, 1] - highs[:, :, 2]
+        slab_highs = highs[:, :, 0] - lows[:, :, 1] - lows[:, :, 2]
+        overlaps &= (slab_lows <= slab_centers + radii) & (slab_highs >= slab_centers - radii)
+        counts = overlaps.sum(axis=1)
+
+        box_highs = corners + box_size - 1
+        slab_range = np.stack([
+            corners[:, 0] - box_highs[:, 1] - box_highs[:, 2],
+            box_highs[:, 0] - corners[:, 1] - corners[:, 2],
+        ], axis=1)
+        # how far each of the four coordinate ranges is from including 0
+        gaps = np.maximum(np.maximum(corners, -box_highs), 0).max(axis=1)
+        slab_gaps = np.maximum(np.maximum(slab_range[:, 0], -slab_range[:, 1]), 0)
+        distances = np.maximum(gaps, slab_gaps)
+        return [
+            Box(-int(count), int(distance), box_size, Point3D(*map(int, corner)))
+            for count, distance, corner in zip(counts, distances, corners)
+        ]
+
+    def can_beat(box: Box, best: Optional[Box]) -> bool:
+        return best is None or (box.count, -box.origin_distance) > (best.count, -best.origin_distance)
+
+    child_offsets = np.array([(dx, dy, dz) for dx in (0, 1) for dy in (0, 1) for dz in (0, 1)], dtype=np.int64)
+    queue = score(low[None, :], size)
+    best: Optional[Box] = None
+    while queue:
+        box = heapq.heappop(queue)
+        if best is not None and box.count < best.count:
+            # nothing left in the queue can reach more bots
+            break
+        if not can_beat(box, best):
+            continue
+        if box.size == 1:
+            u1, u2, u3 = box.corner
+            if (u1 - u2) % 2 == 0 and (u1 - u3) % 2 == 0:
+                best = box
+            continue
+        half = box.size // 2
+        for child in score(np.array(box.corner, dtype=np.int64) + child_offsets * half, half):
+            if child.count and can_beat(child, best):
+                heapq.heappush(queue, child)
+
+    if best is None:
+        raise ValueError('No nanobots')
+    u1, u2, u3 = best.corner
+    return best._replace(corner=Point3D((u2 + u3) // 2, (u1 - u3) // 2, (u1 - u2) // 2))
+
 
 if __name__ == '__main__':
     main()
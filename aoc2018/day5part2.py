@@ -1,15 +1,26 @@
 #!/usr/bin/env python3
 
+import random
 import sys
 import string
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-def main(filename):
+def main(filename, benchmark_arg=None):
     with open(filename) as f:
         polymer = f.readline().strip()
 
-    print(min(react_polymer(remove_letter(letter, polymer))
-        for letter in string.ascii_lowercase))
+    print(shortest_without_one_unit(polymer.encode()))
+
+    if benchmark_arg == 'benchmark':
+        benchmark()
+
+
+def main_regex(polymer):
+    """The original version: strips each letter out of the full polymer with a regex, then reacts it."""
+    return min(react_polymer(remove_letter(letter, polymer))
+        for letter in string.ascii_lowercase)
 
 
 def remove_letter(letter, polymer):
@@ -31,5 +42,72 @@ def react_polymer(polymer):
     return len(stack)
 
 
+def reduce_polymer(polymer):
+    """
+    Same stack reduction as react_polymer, but on bytes: the stack is a
+    preallocated bytearray with a separate top index, so nothing is boxed
+    or resized, and the result is sliced out through a memoryview.
+    """
+    stack = bytearray(len(polymer))
+    top = 0
+    for val in polymer:
+        if top and stack[top - 1] ^ val == 32:
+            top -= 1
+        else:
+            stack[top] = val
+            top += 1
+    return bytes(memoryview(stack)[:top])
+
+
+def variant_length(reduced, letter):
+    """Length of the polymer after removing one unit type (both cases) and reacting the rest."""
+    return len(reduce_polymer(reduced.translate(None, letter + letter.upper())))
+
+
+def shortest_without_one_unit(polymer, processes=None):
+    """
+    Any pair that reacts in the full polymer still reacts once a unit type
+    is removed (removal only brings more units together), so the polymer is
+    reduced once up front and the 26 variants start from that much shorter
+    result. The variants run on a process pool of `processes` workers, or
+    in this process when `processes` is 1.
+    """
+    reduced = reduce_polymer(polymer)
+    present = set(reduced.lower())
+    letters = [bytes([letter]) for letter in string.ascii_lowercase.encode() if letter in present]
+    if not letters:
+        return len(reduced)
+    if processes == 1:
+        return min(variant_length(reduced, letter) for letter in letters)
+    with ProcessPoolExecutor(processes) as pool:
+        return min(pool.map(variant_length, [reduced] * len(letters), letters))
+
+
+def random_polymer(length, seed=0):
+    """
+    A polymer shaped like the puzzle input, where most of it reacts away:
+    each unit is either random or, half the time, the opposite of the one
+    before it.
+    """
+    rng = random.Random(seed)
+    units = [rng.choice(string.ascii_letters)]
+    for _ in range(length - 1):
+        units.append(units[-1].swapcase() if rng.random() < 0.5 else rng.choice(string.ascii_letters))
+    return ''.join(units)
+
+
+def benchmark():
+    for length in (50_000, 5_000_000):
+        polymer = random_polymer(length)
+        encoded = polymer.encode()
+        print(f'--- {length} units ---')
+        for name, solve in (('regex', lambda: main_regex(polymer)),
+                            ('bytes', lambda: shortest_without_one_unit(encoded, processes=1)),
+                            ('bytes, process pool', lambda: shortest_without_one_unit(encoded))):
+            start = time.perf_counter()
+            result = solve()
+            print(f'{name}: {result} in {time.perf_counter() - start:.2f}s')
+
+
 if __name__ == '__main__':
-    main(sys.argv[1])
+    main(*sys.argv[1:3])
@@ -3,30 +3,7 @@ from collections import defaultdict
 import re
 import sys
 
-
-class Marble:
-    value: int = 0
-    # clockwise
-    next: Marble = None
-
-    # counterclockwise
-    prev: Marble = None
-
-    def __init__(self, value: int):
-        self.value = value
-        self.next = self
-        self.prev = self
-
-    def insert_after(self, new_marble: Marble):
-        old_next = self.next
-        self.next = new_marble
-        new_marble.prev = self
-        new_marble.next = old_next
-        old_next.prev = new_marble
-
-    def remove(self):
-        self.next.prev = self.prev
-        self.prev.next = self.next
+from aoc2018.circular import CircularList
 
 
 def main():
@@ -42,19 +19,21 @@ def main():
 
 def get_high_score(num_players, last_marble_value):
     scores = defaultdict(int)
-    current_marble = Marble(0)
+    # marbles are numbered 0..last_marble_value, so the marble values double as node indexes
+    circle = CircularList(last_marble_value + 1)
+    clockwise = circle.next
+    current_marble = 0
     player_index = 0
     for marble_value in range(1, last_marble_value + 1):
         player_index = (player_index + 1) % num_players
         if marble_value % 23 == 0:
-            to_remove = current_marble.prev.prev.prev.prev.prev.prev.prev
-            scores[player_index] += marble_value + to_remove.value
-            to_remove.remove()
-            current_marble = to_remove.next
+            to_remove = circle.step_back(current_marble, 7)
+            scores[player_index] += marble_value + to_remove
+            current_marble = clockwise[to_remove]
+            circle.remove(to_remove)
         else:
-            new_marble = Marble(marble_value)
-            current_marble.next.insert_after(new_marble)
-            current_marble = new_marble
+            circle.insert_after(clockwise[current_marble], marble_value)
+            current_marble = marble_value
 
     return max(scores.values())
 
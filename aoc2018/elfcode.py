@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import math
+import sys
+import time
+from typing import Callable, Iterable, Iterator, Sequence
+
+# Compiled engine for the day 16/19/21 register machine. The program is cut
+# into basic blocks (straight runs of instructions ending at the first write to
+# the ip register), and each block is turned into Python source and exec'd into
+# a plain function that mutates the register list and returns the next ip.
+# Reads of the ip register inside a block are constant-folded, since its value
+# is known at every instruction.
+
+OPERATION_TEMPLATES = {
+    'addr': '{A} + {B}',
+    'addi': '{A} + {b}',
+    'mulr': '{A} * {B}',
+    'muli': '{A} * {b}',
+    'banr': '{A} & {B}',
+    'bani': '{A} & {b}',
+    'borr': '{A} | {B}',
+    'bori': '{A} | {b}',
+    'setr': '{A}',
+    'seti': '{a}',
+    'gtir': '1 if {a} > {B} else 0',
+    'gtri': '1 if {A} > {b} else 0',
+    'gtrr': '1 if {A} > {B} else 0',
+    'eqir': '1 if {a} == {B} else 0',
+    'eqri': '1 if {A} == {b} else 0',
+    'eqrr': '1 if {A} == {B} else 0',
+}
+
+# which of the a/b operands are register references for each operation
+REGISTER_OPERANDS = {
+    name: ('{A}' in template, '{B}' in template)
+    for name, template in OPERATION_TEMPLATES.items()
+}
+
+Block = Callable[[list[int]], int]
+
+
+class Program:
+    """
+    A register machine program compiled lazily into basic-block functions.
+
+    `instructions` can be any sequence of (name, a, b, c) tuples, such as the
+    `Instruction`s from day 19's `parse_lines`. Any ip in `breakpoints` always
+    starts a block, so that `run` can stop just before executing it.
+    """
+    instructions: Sequence[tuple[str, int, int, int]]
+    ip_index: int
+    breakpoints: frozenset[int]
+    blocks: dict[int, Block]
+    block_ends: dict[int, int]
+    steps: int
+    loops_skipped: int
+
+    def __init__(self, instructions: Sequence[tuple[str, int, int, int]], ip_index: int,
+                 breakpoints: Iterable[int] = ()):
+        self.instructions = instructions
+        self.ip_index = ip_index
+        self.breakpoints = frozenset(breakpoints)
+        self.blocks = {}
+        self.block_ends = {}
+        self.steps = 0
+        self.loops_skipped = 0
+
+    def block_end(self, start: int) -> int:
+        """Index one past the last instruction of the block starting at `start`."""
+        end = start
+        while end < len(self.instructions):
+            end += 1
+            if self.instructions[end - 1][3] == self.ip_index or end in self.breakpoints:
+                break
+        return end
+
+    def compile_block(self, start: int) -> Block:
+        end = self.block_end(start)
+        lines = [f'def block_{start}(r):']
+        for pc in range(start, end):
+            name, a, b, c = self.instructions[pc]
+            expression = OPERATION_TEMPLATES[name].format(
+                a=a,
+                b=b,
+                A=pc if a == self.ip_index else f'r[{a}]',
+                B=pc if b == self.ip_index else f'r[{b}]',
+            )
+            if c == self.ip_index:
+                lines.append(f'    v = r[{c}] = {expression}')
+                lines.append('    return v + 1')
+                break
+            lines.append(f'    r[{c}] = {expression}')
+        else:
+            lines.append(f'    r[{self.ip_index}] = {end - 1}')
+            lines.append(f'    return {end}')
+
+        namespace = {}
+        exec('\n'.join(lines), namespace)
+        block = namespace[f'block_{start}']
+        self.blocks[start] = block
+        self.block_ends[start] = end
+        return block
+
+    def run(self, registers: list[int], ip: int = 0, max_steps: int | None = None,
+            skip_loops: bool = False) -> Iterator[int]:
+        """
+        Executes the program against `registers` in place, yielding the ip every
+        time a breakpoint is about to run. Stops when the ip leaves the program
+        or after roughly `max_steps` instructions (the budget is checked at
+        block boundaries).
+
+        With `skip_loops`, hot loops whose registers change by the same amount on
+        every trip are fast-forwarded; see `find_loop_skip`.
+        """
+        blocks = self.blocks
+        block_ends = self.block_ends
+        breakpoints = self.breakpoints
+        program_length = len(self.instructions)
+        step_limit = math.inf if max_steps is None else self.steps + max_steps
+
+        # loop detection state: the head of the most recent backward jump, the
+        # blocks run since we last arrived there, and the registers at that time
+        loop_head = -1
+        trace: list[int] = []
+        previous_trace: list[int] | None = None
+        snapshot: list[int] = []
+
+        first = True
+        while 0 <= ip < program_length and self.steps < step_limit:
+            if ip in breakpoints and not first:
+                yield ip
+            first = False
+
+            block = blocks.get(ip) or self.compile_block(ip)
+            start = ip
+            ip = block(registers)
+            self.steps += block_ends[start] - start
+
+            if skip_loops:
+                trace.append(start)
+                if ip <= start:
+                    if ip == loop_head and trace == previous_trace:
+                        self.skip_loop(trace, snapshot, registers, step_limit)
+                    loop_head = ip
+                    previous_trace = trace
+                    snapshot = registers[:]
+                    trace = []
+
+    def skip_loop(self, trace: list[int], snapshot: list[int], registers: list[int], step_limit: float):
+        if any(start in self.breakpoints for start in trace[1:]):
+            return
+        deltas = [now - before for now, before in zip(registers, snapshot)]
+        path = [pc for start in trace for pc in range(start, self.block_ends[start])]
+        trips = find_loop_skip(self.instructions, self.ip_index, path, registers, deltas)
+        if trips is None:
+            return
+        trips = min(trips, (step_limit - self.steps) // len(path))
+        if trips == math.inf:
+            raise RuntimeError(f'Infinite loop at ip {trace[0]}')
+        trips = int(trips)
+        if trips > 0:
+            for i, delta in enumerate(deltas):
+                registers[i] += trips * delta
+            self.steps += trips * len(path)
+            self.loops_skipped += 1
+
+
+def find_loop_skip(instructions: Sequence[tuple[str, int, int, int]], ip_index: int, path: list[int],
+                   registers: list[int], deltas: list[int]) -> int | float | None:
+    """
+    Checks whether the loop body `path` (a list of instruction indices) is an
+    affine recurrence: starting from `registers`, every trip adds `deltas` to the
+    registers and takes the same branches. Returns how many trips can be skipped
+    before some comparison would flip, or None if the loop isn't affine.
+
+    Every register is tracked as a (value, slope) pair, i.e. its value after k
+    trips is value + k * slope.
+    """
+    values = registers[:]
+    slopes = deltas[:]
+    trips = math.inf
+
+    for i, pc in enumerate(path):
+        name, a, b, c = instructions[pc]
+        a_is_register, b_is_register = REGISTER_OPERANDS[name]
+        if a_is_register:
+            va, sa = (pc, 0) if a == ip_index else (values[a], slopes[a])
+        else:
+            va, sa = a, 0
+        if b_is_register:
+            vb, sb = (pc, 0) if b == ip_index else (values[b], slopes[b])
+        else:
+            vb, sb = b, 0
+
+        kind = name[:2]
+        if kind == 'ad':
+            value, slope = va + vb, sa + sb
+        elif kind == 'mu':
+            if sa and sb:
+                return None
+            value, slope = va * vb, va * sb + sa * vb
+        elif kind in ('ba', 'bo'):
+            if sa or sb:
+                return None
+            value, slope = (va & vb) if kind == 'ba' else (va | vb), 0
+        elif kind == 'se':
+            value, slope = va, sa
+        else:
+            # comparison: the result is fixed as long as the sign of diff(k) doesn't change
+            diff, diff_slope = va - vb, sa - sb
+            if kind == 'gt':
+                value = 1 if diff > 0 else 0
+                if value and diff_slope < 0:
+                    trips = min(trips, (diff - 1) // -diff_slope + 1)
+                elif not value and diff_slope > 0:
+                    trips = min(trips, -diff // diff_slope + 1)
+            else:
+                value = 1 if diff == 0 else 0
+                if value and diff_slope:
+                    trips = min(trips, 1)
+                elif diff_slope and -diff % diff_slope == 0 and -diff // diff_slope > 0:
+                    trips = min(trips, -diff // diff_slope)
+            slope = 0
+
+        if c == ip_index:
+            # the jump has to land where it did last trip, and keep doing so
+            next_pc = path[i + 1] if i + 1 < len(path) else path[0]
+            if slope or value + 1 != next_pc:
+                return None
+        values[c] = value
+        slopes[c] = slope
+
+    if slopes != deltas or any(v - r != d for v, r, d in zip(values, registers, deltas)):
+        return None
+    return trips
+
+
+def main():
+    from aoc2018.day19 import execute, parse_lines
+
+    with open(sys.argv[1]) as f:
+        lines = [line.strip() for line in f.readlines()]
+    ip_index, instructions = parse_lines(lines)
+    max_steps = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000_000
+
+    start = time.perf_counter()
+    execute(instructions, ip_index, [0] * 6, max_steps=max_steps)
+    elapsed = time.perf_counter() - start
+    print(f'interpreter: {max_steps} steps in {elapsed:.3f}s ({max_steps / elapsed:,.0f} steps/s)')
+
+    for skip_loops in (False, True):
+        program = Program(instructions, ip_index)
+        start = time.perf_counter()
+        for _ in program.run([0] * 6, max_steps=max_steps, skip_loops=skip_loops):
+            pass
+        elapsed = time.perf_counter() - start
+        label = 'compiled + loop skipping' if skip_loops else 'compiled'
+        print(f'{label}: {program.steps} steps in {elapsed:.3f}s ({program.steps / elapsed:,.0f} steps/s, '
+              f'{program.loops_skipped} loops skipped)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import math
+from typing import Iterable, NamedTuple, Sequence
+
+import numpy as np
+
+
+class SquareTotal(NamedTuple):
+    start_x: int
+    start_y: int
+    size: int
+    total: int
+
+
+def summed_area_table(grid: Sequence[Sequence[int]] | np.ndarray) -> np.ndarray:
+    """
+    Integral image of `grid`, padded with a leading row and column of zeros so
+    that table[y, x] is the sum of grid[:y, :x].
+    """
+    values = np.asarray(grid, dtype=np.int64)
+    table = np.zeros((values.shape[0] + 1, values.shape[1] + 1), dtype=np.int64)
+    np.cumsum(np.cumsum(values, axis=0), axis=1, out=table[1:, 1:])
+    return table
+
+
+def square_totals(table: np.ndarray, size: int) -> np.ndarray:
+    """Totals of every size x size square, indexed by the square's top-left corner."""
+    return table[size:, size:] - table[:-size, size:] - table[size:, :-size] + table[:-size, :-size]
+
+
+def best_square(grid: Sequence[Sequence[int]] | np.ndarray, sizes: Iterable[int]) -> SquareTotal:
+    """
+    Finds the square with the largest total out of all squares with a side
+    length in `sizes`. Ties go to the smallest size, then the top-most, then
+    the left-most square.
+    """
+    return best_square_in_table(summed_area_table(grid), sizes)
+
+
+def best_square_in_table(table: np.ndarray, sizes: Iterable[int]) -> SquareTotal:
+    """Same as `best_square`, reusing a table from `summed_area_table`."""
+    best = SquareTotal(-1, -1, 0, -math.inf)
+    for size in sizes:
+        totals = square_totals(table, size)
+        if totals.size == 0:
+            continue
+        y, x = np.unravel_index(np.argmax(totals), totals.shape)
+        total = int(totals[y, x])
+        if total > best.total:
+            best = SquareTotal(int(x), int(y), size, total)
+    return best
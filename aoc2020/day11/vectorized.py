@@ -0,0 +1,182 @@
+import sys
+import time
+
+import numpy as np
+
+import optimized
+import solution
+
+DIRECTIONS = [
+    (-1, -1),
+    (-1, 0),
+    (-1, 1),
+    (0, -1),
+    (0, 1),
+    (1, -1),
+    (1, 0),
+    (1, 1)
+]
+
+
+class SeatGraph:
+    """
+    The seats and who they can see, as CSR arrays: the neighbours of seat i
+    are indices[indptr[i]:indptr[i + 1]]. Seats are numbered in reading order.
+    """
+
+    def __init__(self, room, max_distance=None):
+        seat_mask = np.array([[char != '.' for char in row] for row in room])
+        self.seat_count = int(seat_mask.sum())
+        seat_ids = np.full(seat_mask.shape, -1, dtype=np.int64)
+        seat_ids[seat_mask] = np.arange(self.seat_count)
+        self.occupied = np.array([char == '#' for row in room for char in row if char != '.'], dtype=np.int8)
+
+        ys, xs = np.nonzero(seat_mask)
+        owners = []
+        targets = []
+        for dy, dx in DIRECTIONS:
+            seats, neighbors = first_seat_seen(seat_mask, seat_ids, ys, xs, dy, dx, max_distance)
+            owners.append(seats)
+            targets.append(neighbors)
+        owners = np.concatenate(owners)
+        targets = np.concatenate(targets)
+        order = np.argsort(owners, kind='stable')
+        self.indices = targets[order]
+        self.indptr = np.zeros(self.seat_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(owners, minlength=self.seat_count), out=self.indptr[1:])
+
+    def neighbor_lists(self, seats=None):
+        """The neighbours of every seat in `seats` (default all of them) run together, and how many each has."""
+        if seats is None:
+            return self.indices, np.diff(self.indptr)
+        starts = self.indptr[seats]
+        lengths = self.indptr[seats + 1] - starts
+        offsets = np.cumsum(lengths) - lengths
+        return self.indices[np.arange(lengths.sum()) - np.repeat(offsets - starts, lengths)], lengths
+
+    def occupied_neighbors(self, seats=None):
+        """How many neighbours of each seat (or just of `seats`) are occupied: one gather and one sum."""
+        neighbors, lengths = self.neighbor_lists(seats)
+        totals = np.zeros(len(neighbors) + 1, dtype=np.int32)
+        np.cumsum(self.occupied[neighbors], dtype=np.int32, out=totals[1:])
+        ends = np.cumsum(lengths)
+        return totals[ends] - totals[ends - lengths]
+
+    def settle(self, occupied_limit):
+        """
+        Runs rounds until nothing changes, and returns how many rounds that took.
+        Only seats that changed last round, or that can see one that did,
+        can change this round, so after the first round just those are checked.
+        """
+        rounds = 0
+        dirty = None
+        dirty_mask = np.zeros(self.seat_count, dtype=bool)
+        while dirty is None or len(dirty):
+            rounds += 1
+            counts = self.occupied_neighbors(dirty)
+            current = self.occupied if dirty is None else self.occupied[dirty]
+            new = np.where(current == 1, counts < occupied_limit, counts == 0).astype(np.int8)
+            changed = np.nonzero(new != current)[0]
+            if dirty is not None:
+                changed = dirty[changed]
+            self.occupied[changed] ^= 1
+            dirty_mask[changed] = True
+            dirty_mask[self.neighbor_lists(changed)[0]] = True
+            dirty = np.flatnonzero(dirty_mask)
+            dirty_mask[dirty] = False
+        return rounds
+
+    def count_occupied(self):
+        return int(self.occupied.sum())
+
+
+def first_seat_seen(seat_mask, seat_ids, ys, xs, dy, dx, max_distance=None):
+    """
+    For the seats at (ys, xs), the first seat along (dy, dx), looking at most
+    max_distance away. Returns (seat, seat it sees) pairs for the seats that
+    see one. Every step only looks further for seats still looking at floor.
+    """
+    height, width = seat_mask.shape
+    looking = seat_ids[ys, xs]
+    found_seats = []
+    found_neighbors = []
+    distance = 0
+    while len(looking) and (max_distance is None or distance < max_distance):
+        distance += 1
+        ny = ys + dy * distance
+        nx = xs + dx * distance
+        inside = (0 <= ny) & (ny < height) & (0 <= nx) & (nx < width)
+        looking, ys, xs, ny, nx = looking[inside], ys[inside], xs[inside], ny[inside], nx[inside]
+        hit = seat_mask[ny, nx]
+        found_seats.append(looking[hit])
+        found_neighbors.append(seat_ids[ny[hit], nx[hit]])
+        looking, ys, xs = looking[~hit], ys[~hit], xs[~hit]
+    if not found_seats:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(found_seats), np.concatenate(found_neighbors)
+
+
+def main():
+    with open(sys.argv[1]) as f:
+        waiting_room = [l.strip() for l in f]
+
+    # part 1
+    seats = SeatGraph(waiting_room, max_distance=1)
+    seats.settle(occupied_limit=4)
+    print(seats.count_occupied())
+
+    # part 2
+    seats = SeatGraph(waiting_room)
+    seats.settle(occupied_limit=5)
+    print(seats.count_occupied())
+
+    if len(sys.argv) > 2 and sys.argv[2] == 'benchmark':
+        benchmark(waiting_room, int(sys.argv[3]) if len(sys.argv) > 3 else 1000)
+
+
+def scaled_room(room, size):
+    """
+    A size x size room made of copies of `room`, with a row and column of
+    floor between them. Copies pressed right up against each other (or
+    random rooms) tend to end up flipping back and forth forever.
+    """
+    tile = [row + '.' for row in room] + ['.' * (len(room[0]) + 1)]
+    rows = (tile * (size // len(tile) + 1))[:size]
+    return [(row * (size // len(row) + 1))[:size] for row in rows]
+
+
+def benchmark(room, size, grid_limit=200):
+    room = scaled_room(room, size)
+    print(f'--- {size}x{size} room ---')
+    for part, max_distance, occupied_limit in ((1, 1, 4), (2, None, 5)):
+        start = time.perf_counter()
+        seats = SeatGraph(room, max_distance)
+        built = time.perf_counter()
+        rounds = seats.settle(occupied_limit)
+        print(f'part {part} vectorized: {seats.count_occupied()} after {rounds} rounds, '
+              f'{built - start:.2f}s to build, {time.perf_counter() - built:.2f}s to settle')
+
+        start = time.perf_counter()
+        get_neighbor = optimized.get_neighbor_part1 if part == 1 else optimized.get_neighbor_part2
+        seat_graph = optimized.build_seat_graph(room, get_neighbor)
+        while optimized.iterate_seats(seat_graph, occupied_limit):
+            pass
+        print(f'part {part} optimized.py: {optimized.count_occupied(seat_graph)} '
+              f'in {time.perf_counter() - start:.2f}s')
+
+        # solution.py copies the whole grid every round and doesn't finish in any reasonable time on big rooms
+        if size <= grid_limit:
+            start = time.perf_counter()
+            solution.HEIGHT, solution.WIDTH = len(room), len(room[0])
+            iterate_room = solution.iterate_room1 if part == 1 else solution.iterate_room2
+            grid = [list(row) for row in room]
+            while True:
+                new_grid = iterate_room(grid)
+                if new_grid == grid:
+                    break
+                grid = new_grid
+            print(f'part {part} solution.py: {solution.count_occupied(grid)} in {time.perf_counter() - start:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+from typing import Iterable, Tuple
+
+
+def extended_gcd(a: int, b: int) -> Tuple[int, int, int]:
+    """(g, x, y) with g = gcd(a, b) = a * x + b * y"""
+    old_r, r = a, b
+    old_x, x = 1, 0
+    old_y, y = 0, 1
+    while r:
+        quotient = old_r // r
+        old_r, r = r, old_r - quotient * r
+        old_x, x = x, old_x - quotient * x
+        old_y, y = y, old_y - quotient * y
+    return old_r, old_x, old_y
+
+
+def mod_inverse(a: int, modulus: int) -> int:
+    """x with (a * x) % modulus == 1"""
+    g, x, _ = extended_gcd(a % modulus, modulus)
+    if g != 1:
+        raise ValueError(f'{a} has no inverse mod {modulus}, they share the factor {g}')
+    return x % modulus
+
+
+def merge_congruences(residue1: int, modulus1: int, residue2: int, modulus2: int) -> Tuple[int, int]:
+    """
+    Combines x == residue1 (mod modulus1) and x == residue2 (mod modulus2)
+    into one congruence mod lcm(modulus1, modulus2). The moduli don't have to
+    be coprime, but then the residues have to agree mod their gcd.
+    """
+    if modulus1 < modulus2:
+        residue1, modulus1, residue2, modulus2 = residue2, modulus2, residue1, modulus1
+    # reducing the bigger modulus first keeps Euclid's algorithm down to numbers the size of the smaller one
+    g, p, _ = extended_gcd(modulus1 % modulus2, modulus2)
+    difference = residue2 - residue1 % modulus2
+    if difference % g:
+        raise ValueError(f'x == {residue1} (mod {modulus1}) and x == {residue2} (mod {modulus2}) '
+                         f'contradict each other mod {g}')
+    # x = residue1 + modulus1 * t, with modulus1 * t == difference (mod modulus2),
+    # and p is the inverse of modulus1 / g mod modulus2 / g. As t < modulus2 / g, x < lcm already.
+    step = modulus2 // g
+    return residue1 % modulus1 + modulus1 * (difference // g * p % step), modulus1 * step
+
+
+def solve_congruences(congruences: Iterable[Tuple[int, int]]) -> Tuple[int, int]:
+    """
+    The smallest x >= 0 with x == residue (mod modulus) for every
+    (residue, modulus), and the lcm of the moduli (so every solution is x
+    plus a multiple of it). Raises ValueError if there is no solution.
+
+    Congruences are merged into the result one at a time, so each merge only
+    needs Euclid's algorithm on numbers the size of the new modulus, and
+    otherwise a few operations linear in the size of the result so far.
+    """
+    residue, modulus = 0, 1
+    for next_residue, next_modulus in congruences:
+        residue, modulus = merge_congruences(residue, modulus, next_residue % next_modulus, next_modulus)
+    return residue, modulus
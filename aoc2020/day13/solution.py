@@ -1,15 +1,29 @@
 from collections import deque
+from contextlib import redirect_stdout
+from io import StringIO
+import math
+import random
 import sys
+import time
 from typing import List, Dict, Tuple
 
+import number_theory
+
 
 def main():
     with open(sys.argv[1]) as f:
         lines = [l.strip() for l in f]
 
     part1(lines)
-    part2(lines)
-    part2_simplified(lines)
+    part2_crt(lines)
+
+    if len(sys.argv) > 2 and sys.argv[2] == 'sieve':
+        part2(lines)
+        part2_simplified(lines)
+    elif len(sys.argv) > 2 and sys.argv[2] == 'check':
+        check()
+    elif len(sys.argv) > 2 and sys.argv[2] == 'benchmark':
+        benchmark()
 
 
 def part1(lines: List[str]):
@@ -133,5 +147,89 @@ def part2_simplified(lines: List[str]):
                              f'and current {current} and base {base}')
     print(current)
 
+
+def part2_crt(lines: List[str]):
+    """Bus i leaving i minutes after t means t == -i (mod bus_id), for every bus at once"""
+    congruences = [(-i, int(bus_id)) for i, bus_id in enumerate(lines[1].split(',')) if bus_id != 'x']
+    timestamp, _ = number_theory.solve_congruences(congruences)
+    print(timestamp)
+
+
+def check(rounds=2000, seed=0):
+    """
+    Randomized checks of the number theory module against brute force, with
+    small moduli that often share factors.
+    """
+    rng = random.Random(seed)
+    for _ in range(rounds):
+        a = rng.randrange(1, 10 ** 6)
+        modulus = rng.randrange(2, 10 ** 6)
+        g, x, y = number_theory.extended_gcd(a, modulus)
+        assert g == math.gcd(a, modulus) and a * x + modulus * y == g
+        if g == 1:
+            assert a * number_theory.mod_inverse(a, modulus) % modulus == 1
+
+        congruences = [(rng.randrange(30), rng.randrange(1, 30)) for _ in range(rng.randrange(1, 4))]
+        lcm = math.lcm(*(modulus for _, modulus in congruences))
+        expected = next((x for x in range(lcm) if all((x - r) % m == 0 for r, m in congruences)), None)
+        try:
+            assert number_theory.solve_congruences(congruences) == (expected, lcm)
+        except ValueError:
+            assert expected is None
+
+        # systems built from a known answer, with big moduli, always have a solution
+        answer = rng.getrandbits(256)
+        moduli = [rng.getrandbits(64) | 1 for _ in range(rng.randrange(1, 20))]
+        solution, lcm = number_theory.solve_congruences([(answer, modulus) for modulus in moduli])
+        assert lcm == math.lcm(*moduli) and solution == answer % lcm
+    print(f'{rounds} rounds of checks passed')
+
+
+def random_schedule(bus_count: int, smallest_id: int, seed=0) -> List[str]:
+    """A puzzle input with bus_count distinct prime bus IDs from smallest_id up, some minutes apart"""
+    rng = random.Random(seed)
+    primes = []
+    candidate = smallest_id
+    while len(primes) < bus_count * 2:
+        if all(candidate % p for p in range(2, math.isqrt(candidate) + 1)):
+            primes.append(candidate)
+        candidate += 1
+    first, *others = rng.sample(primes, bus_count)
+    schedule = [str(first)]
+    for bus_id in others:
+        schedule += ['x'] * rng.randrange(5) + [str(bus_id)]
+    return ['0', ','.join(schedule)]
+
+
+def benchmark():
+    if hasattr(sys, 'set_int_max_str_digits'):
+        # the answers get far longer than the default limit
+        sys.set_int_max_str_digits(0)
+    for bus_count, smallest_id, sieves in ((9, 10, True), (100, 1000, True), (300, 10000, True), (3000, 10 ** 6, False)):
+        lines = random_schedule(bus_count, smallest_id)
+        print(f'--- {bus_count} buses with IDs from {smallest_id} ---')
+        solvers = [('crt', part2_crt)] + ([('part2', part2), ('part2_simplified', part2_simplified)] if sieves else [])
+        answers = set()
+        for name, solver in solvers:
+            output = StringIO()
+            start = time.perf_counter()
+            with redirect_stdout(output):
+                solver(lines)
+            answer = int(output.getvalue())
+            answers.add(answer)
+            print(f'{name}: {answer.bit_length()}-bit answer in {time.perf_counter() - start:.3f}s')
+        assert len(answers) == 1
+
+    rng = random.Random(0)
+    for count in (1000, 10000):
+        answer = rng.getrandbits(count * 16)
+        moduli = [rng.randrange(2, 2 ** 64) for _ in range(count)]
+        start = time.perf_counter()
+        solution, lcm = number_theory.solve_congruences([(answer, modulus) for modulus in moduli])
+        assert solution == answer % lcm
+        print(f'crt: {count} congruences mod random 64-bit numbers, {lcm.bit_length()}-bit lcm, '
+              f'in {time.perf_counter() - start:.3f}s')
+
+
 if __name__ == '__main__':
     main()
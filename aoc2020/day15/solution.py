@@ -1,13 +1,21 @@
+from array import array
 from collections import defaultdict
+from itertools import islice
 import sys
+import time
+import tracemalloc
+from typing import Iterator, List
 
 
 def main():
     with open(sys.argv[1]) as f:
         starting_numbers = [int(s) for s in f.readline().split(',')]
 
-    v4(starting_numbers, 2020)
-    v4(starting_numbers, 30000000)
+    v5(starting_numbers, 2020)
+    v5(starting_numbers, 30000000)
+
+    if len(sys.argv) > 2 and sys.argv[2] == 'benchmark':
+        benchmark(starting_numbers)
 
 
 # note that v1, v2, v3 all do the same things, just at various levels of
@@ -34,6 +42,7 @@ def v1(starting_numbers, stop_index):
                 numbers.append(n)
                 last_seen_indexes[n].append(i)
     print(n)
+    return n
 
 
 def v2(starting_numbers, stop_index):
@@ -53,6 +62,7 @@ def v2(starting_numbers, stop_index):
             last, prev = last_seen_indexes.get(n, (None, None))
             last_seen_indexes[n] = (i, last)
     print(n)
+    return n
 
 
 def v3(starting_numbers, stop_index):
@@ -65,6 +75,7 @@ def v3(starting_numbers, stop_index):
         last_seen_indexes[prev_n] = i - 1
         prev_n = n
     print(n)
+    return n
 
 
 def v4(starting_numbers, stop_index):
@@ -80,6 +91,73 @@ def v4(starting_numbers, stop_index):
         last_seen_indexes[prev_n] = i - 1
         prev_n = n
     print(n)
+    return n
+
+
+def v5(starting_numbers, stop_index):
+    """like v4 but with a typed array (4 bytes a slot instead of a pointer to a boxed int), -1 meaning unseen"""
+    last_seen_indexes = array('i', [-1]) * stop_index
+    for i, n in enumerate(starting_numbers[:-1]):
+        last_seen_indexes[n] = i
+    prev_n = starting_numbers[-1]
+    for i in range(len(starting_numbers), stop_index):
+        prev_index = last_seen_indexes[prev_n]
+        last_seen_indexes[prev_n] = i - 1
+        prev_n = 0 if prev_index < 0 else i - 1 - prev_index
+    n = prev_n
+    print(n)
+    return n
+
+
+def van_eck(starting_numbers: List[int]) -> Iterator[int]:
+    """
+    Streams the whole sequence lazily, starting numbers included. Storage is
+    the same as v5, grown by doubling since there's no stop index up front.
+    """
+    yield from starting_numbers
+    last_seen_indexes = array('i', [-1]) * max(1 << 16, 2 * max(starting_numbers) + 2)
+    for i, n in enumerate(starting_numbers[:-1]):
+        last_seen_indexes[n] = i
+    prev_n = starting_numbers[-1]
+    i = len(starting_numbers)
+    while True:
+        # every new number is less than the current index, so this is always big enough
+        if i >= len(last_seen_indexes):
+            last_seen_indexes.extend(array('i', [-1]) * len(last_seen_indexes))
+        prev_index = last_seen_indexes[prev_n]
+        last_seen_indexes[prev_n] = i - 1
+        prev_n = 0 if prev_index < 0 else i - 1 - prev_index
+        yield prev_n
+        i += 1
+
+
+def nth_van_eck(starting_numbers, stop_index):
+    n = next(islice(van_eck(starting_numbers), stop_index - 1, None))
+    print(n)
+    return n
+
+
+# v1 keeps every index each number was seen at, which doesn't fit in memory at 3*10^7
+VARIANT_LIMITS = {v1: 3_000_000}
+
+
+def benchmark(starting_numbers):
+    for stop_index in (2020, 3_000_000, 30_000_000):
+        print(f'--- {stop_index} numbers ---')
+        for variant in (v1, v2, v3, v4, v5, nth_van_eck):
+            if stop_index > VARIANT_LIMITS.get(variant, stop_index):
+                print(f'{variant.__name__}: skipped')
+                continue
+            start = time.perf_counter()
+            variant(starting_numbers, stop_index)
+            elapsed = time.perf_counter() - start
+
+            # separate run, since tracing allocations slows everything down
+            tracemalloc.start()
+            variant(starting_numbers, stop_index)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f'{variant.__name__}: {elapsed:.2f}s, peak memory {peak / 2 ** 20:.1f} MiB')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,142 @@
+"""
+Matching slots to values, one value each, when each slot has a set of
+candidate values, here ticket fields -> rules. Candidate sets are int
+bitmasks: bit v of candidates[slot] is set if that slot could take value v.
+"""
+from collections import deque
+from typing import Dict, List
+
+
+def bits(mask: int) -> List[int]:
+    """The indexes of the set bits, lowest first"""
+    result = []
+    while mask:
+        lowest = mask & -mask
+        result.append(lowest.bit_length() - 1)
+        mask ^= lowest
+    return result
+
+
+class ConstraintStats:
+    propagated: int
+    matched: int
+
+    def __init__(self):
+        self.propagated = 0
+        self.matched = 0
+
+    def __repr__(self):
+        return f'{self.propagated} slots resolved by propagation, {self.matched} by matching'
+
+
+def solve(candidates: List[int], stats: ConstraintStats = None) -> List[int]:
+    """
+    A different value for every slot, out of its candidates. Raises ValueError if there's no way to do it.
+
+    First by propagation, off a work queue: a slot with only one candidate
+    left takes it, and a value that only one slot can still take goes to
+    that slot. Each assignment takes the value away from the other slots
+    that had it, and the slot away from the other values it could have
+    taken, queueing anything that's down to one. If that stalls before every
+    slot is resolved, the rest goes to Hopcroft-Karp matching, which finds
+    an answer if there is one (though not the only one, if there are several).
+    """
+    stats = stats or ConstraintStats()
+    candidates = list(candidates)
+    # value -> mask of the unresolved slots that could take it
+    holders: Dict[int, int] = {}
+    for slot, mask in enumerate(candidates):
+        for value in bits(mask):
+            holders[value] = holders.get(value, 0) | (1 << slot)
+
+    assignment = [-1] * len(candidates)
+    slot_queue = deque(slot for slot, mask in enumerate(candidates) if mask & (mask - 1) == 0)
+    value_queue = deque(value for value, mask in holders.items() if mask & (mask - 1) == 0)
+
+    def assign(slot: int, value: int):
+        assignment[slot] = value
+        stats.propagated += 1
+        value_bit = 1 << value
+        slot_bit = 1 << slot
+        for other_slot in bits(holders.pop(value) & ~slot_bit):
+            candidates[other_slot] &= ~value_bit
+            if candidates[other_slot] & (candidates[other_slot] - 1) == 0:
+                slot_queue.append(other_slot)
+        for other_value in bits(candidates[slot] & ~value_bit):
+            holders[other_value] &= ~slot_bit
+            if holders[other_value] & (holders[other_value] - 1) == 0:
+                value_queue.append(other_value)
+        candidates[slot] = value_bit
+
+    while slot_queue or value_queue:
+        if slot_queue:
+            slot = slot_queue.popleft()
+            if assignment[slot] >= 0:
+                continue
+            if not candidates[slot]:
+                raise ValueError(f'Nothing is left for slot {slot}')
+            assign(slot, candidates[slot].bit_length() - 1)
+        else:
+            value = value_queue.popleft()
+            if value in holders and holders[value]:
+                assign(holders[value].bit_length() - 1, value)
+
+    unresolved = [slot for slot, value in enumerate(assignment) if value < 0]
+    if unresolved:
+        matching = hopcroft_karp({slot: bits(candidates[slot]) for slot in unresolved})
+        if len(matching) < len(unresolved):
+            raise ValueError(f'No way to give {len(unresolved)} slots different values')
+        for slot, value in matching.items():
+            assignment[slot] = value
+        stats.matched += len(matching)
+    return assignment
+
+
+def hopcroft_karp(edges: Dict[int, List[int]]) -> Dict[int, int]:
+    """
+    A maximum matching of a bipartite graph, given as left node -> the
+    right nodes it connects to. Returns left node -> right node.
+    """
+    match_left: Dict[int, int] = {}
+    match_right: Dict[int, int] = {}
+    while True:
+        # breadth first from every free left node, along unmatched edges out and matched edges back
+        layer = {left: 0 for left in edges if left not in match_left}
+        queue = deque(layer)
+        found_free_right = False
+        while queue:
+            left = queue.popleft()
+            for right in edges[left]:
+                next_left = match_right.get(right)
+                if next_left is None:
+                    found_free_right = True
+                elif next_left not in layer:
+                    layer[next_left] = layer[left] + 1
+                    queue.append(next_left)
+        if not found_free_right:
+            return match_left
+
+        # depth first along the layers for vertex-disjoint shortest augmenting paths
+        next_edge = {left: 0 for left in layer}
+        for start in [left for left in edges if left not in match_left]:
+            path = [start]
+            while path:
+                left = path[-1]
+                if next_edge[left] == len(edges[left]):
+                    # dead end, don't come back this way in this phase
+                    layer[left] = -1
+                    path.pop()
+                    continue
+                right = edges[left][next_edge[left]]
+                next_edge[left] += 1
+                next_left = match_right.get(right)
+                if next_left is None:
+                    # augment: each left node on the path takes the right node it went through
+                    for left_on_path in reversed(path):
+                        previous_right = match_left.get(left_on_path)
+                        match_left[left_on_path] = right
+                        match_right[right] = left_on_path
+                        right = previous_right
+                    break
+                if layer.get(next_left, -1) == layer[left] + 1:
+                    path.append(next_left)
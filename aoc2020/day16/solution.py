@@ -1,9 +1,16 @@
+from contextlib import redirect_stdout
 from functools import reduce
+from io import StringIO
 import operator
 import re
 import sys
+import time
 from typing import Iterable, List, Optional, Set
 
+import numpy as np
+
+import constraints
+
 RULE_RE = re.compile(r'(.*?): (\d+)-(\d+) or (\d+)-(\d+)')
 
 
@@ -33,8 +40,19 @@ def main():
 
     nearby_tickets = [parse_ticket(line) for line in sections[2].strip().split('\n')[1:]]
 
-    valid_tickets = list(part1(rules, nearby_tickets))
-    part2(rules, my_ticket, valid_tickets)
+    lookup = rule_masks_by_value(rules)
+    tickets = np.array(nearby_tickets, dtype=np.int64)
+    valid = valid_rows(lookup, tickets)
+    print(int(tickets[~valid_values(lookup, tickets)].sum()))
+    field_rules = constraints.solve(field_candidates(lookup, np.vstack([[my_ticket], tickets[valid]])))
+    print(reduce(operator.mul, (value for value, rule in zip(my_ticket, field_rules)
+                                if rules[rule].field_name.startswith('departure')), 1))
+
+    if len(sys.argv) > 2 and sys.argv[2] == 'sets':
+        valid_tickets = list(part1(rules, nearby_tickets))
+        part2(rules, my_ticket, valid_tickets)
+    elif len(sys.argv) > 2 and sys.argv[2] == 'benchmark':
+        benchmark()
 
 
 def part1(rules: List[Rule], nearby_tickets: List[List[int]]) -> Iterable[List[int]]:
@@ -79,5 +97,121 @@ def part2(rules: List[Rule], my_ticket: List[int], valid_tickets: List[List[int]
     print(reduce(operator.mul, matching_ticket_fields, 1))
 
 
+WORD_BITS = 64
+
+
+def rule_masks_by_value(rules: List[Rule]) -> np.ndarray:
+    """
+    lookup[value] is the mask of rules the value matches, as rows of 64-bit
+    words (rule i is bit i % 64 of word i // 64). The last row is for every
+    value past the end, which matches nothing.
+    """
+    top = max(max(rule.range1[1], rule.range2[1]) for rule in rules)
+    # +1 where each range starts and -1 just past where it ends, per rule
+    edges = np.zeros((top + 2, len(rules)), dtype=np.int8)
+    for i, rule in enumerate(rules):
+        for low, high in (rule.range1, rule.range2):
+            edges[low, i] += 1
+            edges[high + 1, i] -= 1
+    matches = np.cumsum(edges, axis=0) > 0
+    words = -(-len(rules) // WORD_BITS)
+    padded = np.zeros((top + 2, words * WORD_BITS), dtype=bool)
+    padded[:, :len(rules)] = matches
+    packed = np.packbits(padded, axis=1, bitorder='little')
+    return packed.view('<u8').astype(np.uint64)
+
+
+def lookup_rows(lookup: np.ndarray, tickets: np.ndarray) -> np.ndarray:
+    """Values as row indexes into lookup, with everything out of range sent to the last row"""
+    return np.where((tickets >= 0) & (tickets < len(lookup)), tickets, len(lookup) - 1)
+
+
+def valid_values(lookup: np.ndarray, tickets: np.ndarray) -> np.ndarray:
+    """Whether each value matches any rule"""
+    return lookup.any(axis=1)[lookup_rows(lookup, tickets)]
+
+
+def valid_rows(lookup: np.ndarray, tickets: np.ndarray) -> np.ndarray:
+    return valid_values(lookup, tickets).all(axis=1)
+
+
+def field_candidates(lookup: np.ndarray, tickets: np.ndarray) -> List[int]:
+    """
+    For each field, the mask of rules that every ticket's value matches.
+    Each field only needs to look at each distinct value once, so the
+    values seen are marked in a table first.
+    """
+    field_count = tickets.shape[1]
+    seen = np.zeros((field_count, len(lookup)), dtype=bool)
+    seen[np.arange(field_count), lookup_rows(lookup, tickets)] = True
+    candidates = []
+    for field in range(field_count):
+        words = np.bitwise_and.reduce(lookup[seen[field]], axis=0)
+        candidates.append(int.from_bytes(words.astype('<u8').tobytes(), 'little'))
+    return candidates
+
+
+def random_notes(field_count: int, ticket_count: int, seed=0):
+    """
+    Rules and tickets shaped like the puzzle's: the rules' ranges are nested,
+    so a field could follow any rule at least as wide as its own, and a
+    tenth of the tickets have one value that matches nothing.
+    Returns (rules, my ticket, nearby tickets as an array, the rule for each field).
+    """
+    rng = np.random.default_rng(seed)
+    top = 10 * field_count
+    widths = np.sort(rng.choice(np.arange(top // 2, top), field_count, replace=False))
+    gap = top // 4
+    rules = [Rule(f'field {i}: 0-{gap - 1} or {gap + 1}-{width}') for i, width in enumerate(widths.tolist())]
+    field_rules = rng.permutation(field_count)
+
+    tickets = np.empty((ticket_count + 1, field_count), dtype=np.int32)
+    for field, rule in enumerate(field_rules.tolist()):
+        (low1, high1), (low2, high2) = rules[rule].range1, rules[rule].range2
+        values = rng.integers(0, high1 - low1 + high2 - low2 + 2, ticket_count + 1)
+        tickets[:, field] = np.where(values <= high1, values, values - (high1 + 1) + low2)
+    invalid = rng.random(ticket_count + 1) < 0.1
+    invalid[0] = False
+    tickets[invalid, rng.integers(field_count, size=int(invalid.sum()))] = top + 1
+    return rules, tickets[0].tolist(), tickets[1:], field_rules.tolist()
+
+
+def benchmark():
+    for field_count, ticket_count, run_sets in ((20, 1000, True), (100, 10_000, True), (1000, 100_000, False)):
+        rules, my_ticket, tickets, expected = random_notes(field_count, ticket_count)
+        print(f'--- {field_count} fields, {ticket_count} tickets ---')
+        start = time.perf_counter()
+        lookup = rule_masks_by_value(rules)
+        valid = valid_rows(lookup, tickets)
+        candidates = field_candidates(lookup, np.vstack([[my_ticket], tickets[valid]]))
+        filtered = time.perf_counter()
+        stats = constraints.ConstraintStats()
+        field_rules = constraints.solve(candidates, stats)
+        solved = time.perf_counter()
+        assert field_rules == expected
+        print(f'bitmasks: {filtered - start:.2f}s to filter, {solved - filtered:.2f}s to solve ({stats})')
+
+        if run_sets:
+            nearby_tickets = tickets.tolist()
+            start = time.perf_counter()
+            with redirect_stdout(StringIO()):
+                part2(rules, my_ticket, list(part1(rules, nearby_tickets)))
+            print(f'sets: in {time.perf_counter() - start:.2f}s')
+
+    # candidates that propagation can't untangle: the right rule plus three random ones for each field
+    rng = np.random.default_rng(0)
+    field_count = 1000
+    expected = rng.permutation(field_count).tolist()
+    candidates = [(1 << rule) | sum(1 << int(other) for other in rng.integers(field_count, size=3))
+                  for rule in expected]
+    stats = constraints.ConstraintStats()
+    start = time.perf_counter()
+    field_rules = constraints.solve(candidates, stats)
+    assert sorted(field_rules) == list(range(field_count))
+    assert all(candidates[field] >> rule & 1 for field, rule in enumerate(field_rules))
+    print(f'--- {field_count} fields with 4 candidates each ---')
+    print(f'bitmasks: {time.perf_counter() - start:.2f}s to solve ({stats})')
+
+
 if __name__ == '__main__':
     main()
@@ -1,10 +1,25 @@
 import sys
+import time
 from typing import List
 
+import numpy as np
+
 
 def main():
     with open(sys.argv[1]) as f:
-        original_state = [[list(l.strip()) for l in f]]
+        grid = [l.strip() for l in f]
+
+    print(count_active(run(grid, 3), 3))
+    print(count_active(run(grid, 4), 4))
+
+    if len(sys.argv) > 2 and sys.argv[2] == 'lists':
+        main_lists(grid)
+    elif len(sys.argv) > 2 and sys.argv[2] == 'benchmark':
+        benchmark(grid)
+
+
+def main_lists(grid: List[str]):
+    original_state = [[list(row) for row in grid]]
 
     # part 1
     state = original_state
@@ -162,6 +177,90 @@ def count_active_4d(state):
                for space in state)
 
 
+def initial_state(grid: List[str], dims: int) -> np.ndarray:
+    """The starting slice, as a boolean array with dims - 2 extra axes of length 1 in front of y and x"""
+    plane = np.array([[char == '#' for char in row] for row in grid])
+    return plane.reshape((1,) * (dims - 2) + plane.shape)
+
+
+def run(grid: List[str], dims: int, cycles=6, mirror=True) -> np.ndarray:
+    state = initial_state(grid, dims)
+    for _ in range(cycles):
+        state = iterate(state, dims, mirror)
+    return state
+
+
+def iterate(state: np.ndarray, dims: int, mirror=True) -> np.ndarray:
+    """
+    One cycle in any number of dimensions. Axes are ordered like the list
+    versions (..., w, z, y, x).
+
+    Everything starts in a single 2-d slice, so the state stays symmetric
+    under flipping the sign of any coordinate other than x and y. With
+    `mirror`, those axes only store coordinates 0 and up, and the missing
+    neighbour of coordinate 0 at -1 is read from coordinate 1 instead.
+    """
+    extra_axes = dims - 2
+    if mirror:
+        grown = np.pad(state, [(0, 1)] * extra_axes + [(1, 1)] * 2)
+    else:
+        grown = np.pad(state, 1)
+
+    # neighbour counts, as a box sum along one axis at a time
+    counts = grown.astype(np.uint16)
+    for axis in range(dims):
+        counts = box_sum(counts, axis, mirror and axis < extra_axes)
+    counts -= grown
+    return (counts == 3) | (grown & (counts == 2))
+
+
+def box_sum(values: np.ndarray, axis: int, mirrored: bool) -> np.ndarray:
+    """Sums each cell with its two neighbours along `axis`, with a reflection at 0 for a mirrored axis."""
+    values = np.moveaxis(values, axis, 0)
+    total = values.copy()
+    total[1:] += values[:-1]
+    total[:-1] += values[1:]
+    if mirrored and len(values) > 1:
+        total[0] += values[1]
+    return np.moveaxis(total, 0, axis)
+
+
+def count_active(state: np.ndarray, dims: int, mirror=True) -> int:
+    """Counts active cubes, including the mirror images of every cube off the x-y plane."""
+    if not mirror:
+        return int(state.sum())
+    counts = state.astype(np.int64)
+    for axis in range(dims - 2):
+        # every coordinate but 0 stands for itself and its negative
+        weights = np.full(state.shape[axis], 2)
+        weights[0] = 1
+        counts = counts * weights.reshape((-1,) + (1,) * (dims - 1 - axis))
+    return int(counts.sum())
+
+
+def benchmark(grid: List[str]):
+    print('dims  active cubes  full space  half spaces  lists')
+    for dims in range(3, 7):
+        timings = []
+        for mirror in (False, True):
+            start = time.perf_counter()
+            active = count_active(run(grid, dims, mirror=mirror), dims, mirror)
+            timings.append(time.perf_counter() - start)
+        if dims <= 4:
+            start = time.perf_counter()
+            state = [[list(row) for row in grid]]
+            if dims == 3:
+                for _ in range(6):
+                    state = iterate_state_3d(state)
+            else:
+                state = [state]
+                for _ in range(6):
+                    state = iterate_state_4d(state)
+            timings.append(time.perf_counter() - start)
+        lists = f'{timings[2]:.3f}s' if len(timings) > 2 else '-'
+        print(f'{dims:>4}  {active:>12}  {timings[0]:>9.3f}s  {timings[1]:>10.3f}s  {lists:>6}')
+
+
 if __name__ == '__main__':
     main()
 
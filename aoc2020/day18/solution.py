@@ -1,7 +1,10 @@
+import ast
+import random
 import re
 from operator import add, mul
 import sys
-from typing import List, Union, Optional
+import time
+from typing import Callable, Dict, List, Union, Optional, TypeVar
 
 
 OPERATORS = {
@@ -11,14 +14,35 @@ OPERATORS = {
 TOKENIZER = re.compile(r'(\(*)(\d+)(\)*)')
 PAREN_GROUP = re.compile(r'\(([^()]*)\)')
 
+# operator -> how tightly it binds; operators with the same precedence go left to right
+LEFT_TO_RIGHT = {'+': 1, '*': 1}
+PLUS_FIRST = {'+': 2, '*': 1}
+STANDARD = {'+': 1, '*': 2}
+
+# node instances can be shared, the same way the parser shares them
+AST_OPERATORS = {
+    '+': ast.Add(),
+    '*': ast.Mult(),
+}
+
+Token = Union[int, str]
+Value = TypeVar('Value')
+
 
 def main():
     with open(sys.argv[1]) as f:
         expressions = [l.strip() for l in f]
 
-    part1_orig(expressions)
-    part1(expressions)
-    part2(expressions)
+    token_lists = [tokenize(expression) for expression in expressions]
+    print(sum(evaluate(tokens, LEFT_TO_RIGHT) for tokens in token_lists))
+    print(sum(evaluate(tokens, PLUS_FIRST) for tokens in token_lists))
+
+    if len(sys.argv) > 2 and sys.argv[2] == 'trees':
+        part1_orig(expressions)
+        part1(expressions)
+        part2(expressions)
+    elif len(sys.argv) > 2 and sys.argv[2] == 'benchmark':
+        benchmark()
 
 
 def part1_orig(expressions):
@@ -152,5 +176,115 @@ def eval_one_operation1(stack):
         stack.append(fn(operand1, operand2))
 
 
+def tokenize(expression: str) -> List[Token]:
+    """Numbers as ints, operators and parentheses as strings"""
+    return [int(token) if token.isdigit() else token
+            for token in expression.replace('(', '( ').replace(')', ' )').split()]
+
+
+def parse(tokens: List[Token], precedence: Dict[str, int],
+          number: Callable[[int], Value], operation: Callable[[str, Value, Value], Value]) -> Value:
+    """
+    Precedence climbing over the tokens of one expression. `number` and
+    `operation` say what to build from each number and each operator with
+    its two operands, e.g. the value itself, or an ast node.
+    """
+    position = 0
+
+    def operand() -> Value:
+        nonlocal position
+        token = tokens[position]
+        position += 1
+        if token == '(':
+            value = expression(0)
+            position += 1  # the closing parenthesis
+            return value
+        return number(token)
+
+    def expression(min_precedence: int) -> Value:
+        """Everything up to the first operator that doesn't bind tighter than min_precedence"""
+        nonlocal position
+        left = operand()
+        while position < len(tokens):
+            operator = tokens[position]
+            operator_precedence = precedence.get(operator)
+            # a closing parenthesis has no precedence, so it ends the expression too
+            if operator_precedence is None or operator_precedence <= min_precedence:
+                break
+            position += 1
+            left = operation(operator, left, expression(operator_precedence))
+        return left
+
+    return expression(0)
+
+
+def evaluate(tokens: List[Token], precedence: Dict[str, int]) -> int:
+    return parse(tokens, precedence, int, lambda operator, left, right: OPERATORS[operator](left, right))
+
+
+def compile_expression(tokens: List[Token], precedence: Dict[str, int]):
+    """A code object that gives the value of the expression when passed to eval()"""
+    tree = parse(tokens, precedence, lambda value: ast.Constant(value),
+                 lambda operator, left, right: ast.BinOp(left, AST_OPERATORS[operator], right))
+    return compile(ast.fix_missing_locations(ast.Expression(tree)), '<expression>', 'eval')
+
+
+def random_expression(rng: random.Random, max_depth=3, max_operands=6) -> str:
+    """An expression written like the puzzle input"""
+    operands = []
+    for _ in range(rng.randint(2, max_operands)):
+        if max_depth and rng.random() < 0.3:
+            operands.append(f'({random_expression(rng, max_depth - 1, max_operands)})')
+        else:
+            operands.append(str(rng.randint(1, 9)))
+    expression = operands[0]
+    for operand in operands[1:]:
+        expression += f' {rng.choice("+*")} {operand}'
+    return expression
+
+
+def benchmark(count=100_000):
+    rng = random.Random(0)
+    expressions = [random_expression(rng) for _ in range(count)]
+    print(f'--- {count} random expressions, {sum(map(len, expressions)) // count} characters on average ---')
+
+    def timed(name, solve):
+        start = time.perf_counter()
+        result = solve()
+        print(f'{name}: {result} in {time.perf_counter() - start:.2f}s')
+        return result
+
+    start = time.perf_counter()
+    token_lists = [tokenize(expression) for expression in expressions]
+    print(f'tokenize: in {time.perf_counter() - start:.2f}s')
+    for name, precedence in (('left to right', LEFT_TO_RIGHT), ('plus first', PLUS_FIRST), ('standard', STANDARD)):
+        print(f'- {name} -')
+        result = timed('precedence climbing', lambda: sum(evaluate(tokens, precedence) for tokens in token_lists))
+        start = time.perf_counter()
+        code = [compile_expression(tokens, precedence) for tokens in token_lists]
+        print(f'compile: in {time.perf_counter() - start:.2f}s')
+        assert timed('eval compiled', lambda: sum(eval(c) for c in code)) == result
+        if precedence is LEFT_TO_RIGHT:
+            assert timed('eval_part1', lambda: sum(eval_part1(expression) for expression in expressions)) == result
+            assert timed('parse_to_tree2', lambda: sum(parse_to_tree2(expression) for expression in expressions)) \
+                == result
+        elif precedence is PLUS_FIRST:
+            assert timed('parse_to_tree2', lambda: sum(parse_to_tree2(expression, True)
+                                                       for expression in expressions)) == result
+        else:
+            assert timed('python eval', lambda: sum(eval(expression) for expression in expressions)) == result
+
+    # the Node tree on its own can't take parentheses, parse_to_tree2 substitutes them away first
+    flat_expressions = [random_expression(rng, max_depth=0) for _ in range(count)]
+    print(f'--- {count} random expressions without parentheses ---')
+    token_lists = [tokenize(expression) for expression in flat_expressions]
+    for name, precedence, plus_takes_precedence in (('left to right', LEFT_TO_RIGHT, False),
+                                                    ('plus first', PLUS_FIRST, True)):
+        print(f'- {name} -')
+        result = timed('precedence climbing', lambda: sum(evaluate(tokens, precedence) for tokens in token_lists))
+        assert timed('Node tree', lambda: sum(evaluate_tree(expression, plus_takes_precedence)
+                                              for expression in flat_expressions)) == result
+
+
 if __name__ == '__main__':
     main()
@@ -1,5 +1,8 @@
+import random
 import re
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 RULE_PARSER = re.compile(r'(\d+): (?:"(\w)")?(\d.*)?')
 
@@ -75,6 +78,24 @@ def main():
         rule = Rule(line)
         indexed_rules[rule.index] = rule
 
+    indexed_rules2 = indexed_rules.copy()
+    indexed_rules2[8] = Rule('8: 42 | 42 8')
+    indexed_rules2[11] = Rule('11: 42 31 | 42 11 31')
+
+    # part1
+    print(sum(Grammar(indexed_rules).match_all(messages, processes=1)))
+
+    # part2
+    print(sum(Grammar(indexed_rules2).match_all(messages, processes=1)))
+
+    if len(sys.argv) > 2 and sys.argv[2] == 'generators':
+        main_generators(indexed_rules, indexed_rules2, messages)
+    elif len(sys.argv) > 2 and sys.argv[2] == 'benchmark':
+        benchmark(indexed_rules, indexed_rules2)
+
+
+def main_generators(indexed_rules, indexed_rules2, messages):
+    """The original version, with every rule's matches recomputed at every start index"""
     # part1
     rule0 = indexed_rules[0]
     match_count = sum(
@@ -83,14 +104,182 @@ def main():
     print(match_count)
 
     # part2
-    indexed_rules2 = indexed_rules.copy()
-    indexed_rules2[8] = Rule('8: 42 | 42 8')
-    indexed_rules2[11] = Rule('11: 42 31 | 42 11 31')
     match_count = sum(
         1 for message in messages
         if rule0.matches_whole_string(indexed_rules2, message))
     print(match_count)
 
 
+class Grammar:
+    """
+    The rule table compiled down to plain tuples, matched with a chart of
+    (rule, start) -> every position that rule can end at from start. Each
+    entry is worked out once per message, however many options and parent
+    rules ask for it, so looping rules like part 2's 8 and 11 need no special
+    handling. Rules are allowed to loop as long as every loop eats at least
+    one character first (no left recursion), which is true of both parts.
+
+    Rules that can only match a handful of strings (no loops, at most
+    `word_limit` of them) are expanded to those strings up front, so they
+    match with a slice and a set lookup instead of walking their sub-rules.
+    """
+
+    def __init__(self, indexed_rules, word_limit=1000):
+        self.rule_count = max(indexed_rules) + 1
+        # rule index -> terminal character, or a tuple of options (tuples of rule indexes)
+        self.rules = [None] * self.rule_count
+        for index, rule in indexed_rules.items():
+            self.rules[index] = rule.terminal_symbol or tuple(tuple(option) for option in rule.options)
+
+        # rule index -> [(length, every string of that length the rule matches)], or None
+        self.words = [None] * self.rule_count
+        expanded = {}
+        for index in indexed_rules:
+            words = self.expand(index, word_limit, expanded, set())
+            if words is not None:
+                lengths = sorted({len(word) for word in words})
+                self.words[index] = [(length, {word for word in words if len(word) == length})
+                                     for length in lengths]
+
+    def expand(self, rule_index, word_limit, expanded, expanding):
+        """Every string `rule_index` matches, or None if that's infinite or more than word_limit."""
+        if rule_index in expanded:
+            return expanded[rule_index]
+        rule = self.rules[rule_index]
+        if isinstance(rule, str):
+            return {rule}
+        if rule_index in expanding:
+            return None
+        expanding.add(rule_index)
+        words = set()
+        for option in rule:
+            option_words = {''}
+            for sub_rule in option:
+                sub_words = self.expand(sub_rule, word_limit, expanded, expanding)
+                if sub_words is None or len(option_words) * len(sub_words) > word_limit:
+                    option_words = None
+                    break
+                option_words = {prefix + word for prefix in option_words for word in sub_words}
+            if option_words is None or len(words) + len(option_words) > word_limit:
+                words = None
+                break
+            words |= option_words
+        expanding.discard(rule_index)
+        expanded[rule_index] = words
+        return words
+
+    def matches(self, message, start_rule=0):
+        chart = {}
+        rules = self.rules
+        rule_words = self.words
+        rule_count = self.rule_count
+        length = len(message)
+        # (rule, start) pairs being worked out, to catch left recursion
+        in_progress = set()
+
+        def ends(rule_index, start):
+            key = start * rule_count + rule_index
+            result = chart.get(key)
+            if result is not None:
+                return result
+            words = rule_words[rule_index]
+            if start >= length:
+                result = ()
+            elif words is not None:
+                result = tuple(start + word_length for word_length, word_set in words
+                               if message[start:start + word_length] in word_set)
+            else:
+                rule = rules[rule_index]
+                if isinstance(rule, str):
+                    result = (start + 1,) if message[start] == rule else ()
+                else:
+                    if key in in_progress:
+                        raise ValueError(f'Rule {rule_index} is left recursive')
+                    in_progress.add(key)
+                    found = set()
+                    for option in rule:
+                        positions = (start,)
+                        for sub_rule in option:
+                            if len(positions) == 1:
+                                positions = ends(sub_rule, positions[0])
+                            else:
+                                positions = {end for position in positions for end in ends(sub_rule, position)}
+                            if not positions:
+                                break
+                        found.update(positions)
+                    in_progress.discard(key)
+                    result = tuple(found)
+            chart[key] = result
+            return result
+
+        return length in ends(start_rule, 0)
+
+    def match_all(self, messages, processes=None, chunk_size=1000):
+        """
+        Whether each message matches rule 0. With more than one process, the
+        messages are split into chunks and matched on a process pool.
+        """
+        if processes == 1:
+            return [self.matches(message) for message in messages]
+        with ProcessPoolExecutor(processes, initializer=set_worker_grammar, initargs=(self,)) as pool:
+            return list(pool.map(worker_matches, messages, chunksize=chunk_size))
+
+    def generate(self, rng, rule_index=0, loop_probability=0.5):
+        """
+        A random message matching `rule_index`. Options that lead back into
+        the rule being expanded are only taken with `loop_probability`.
+        """
+        rule = self.rules[rule_index]
+        if isinstance(rule, str):
+            return rule
+        looping = [option for option in rule if rule_index in option]
+        options = looping if looping and rng.random() < loop_probability else \
+            [option for option in rule if rule_index not in option]
+        option = rng.choice(options)
+        return ''.join(self.generate(rng, sub_rule, loop_probability) for sub_rule in option)
+
+
+worker_grammar = None
+
+
+def set_worker_grammar(grammar):
+    global worker_grammar
+    worker_grammar = grammar
+
+
+def worker_matches(message):
+    return worker_grammar.matches(message)
+
+
+def random_messages(grammar, count, seed=0):
+    """Half of them generated from rule 0, the other half the same with one character flipped"""
+    rng = random.Random(seed)
+    messages = []
+    for i in range(count):
+        message = grammar.generate(rng)
+        if i % 2:
+            position = rng.randrange(len(message))
+            message = message[:position] + ('a' if message[position] == 'b' else 'b') + message[position + 1:]
+        messages.append(message)
+    return messages
+
+
+def benchmark(indexed_rules, indexed_rules2, count=100_000, old_count=1000):
+    grammar = Grammar(indexed_rules2)
+    messages = random_messages(grammar, count)
+    print(f'--- {count} messages, {sum(map(len, messages)) // count} characters on average ---')
+    for processes in (1, None):
+        start = time.perf_counter()
+        matched = sum(grammar.match_all(messages, processes))
+        print(f'chart, {processes or "default"} processes: {matched} matched in {time.perf_counter() - start:.2f}s')
+
+    start = time.perf_counter()
+    matched = sum(1 for message in messages[:old_count]
+                  if indexed_rules2[0].matches_whole_string(indexed_rules2, message))
+    elapsed = time.perf_counter() - start
+    print(f'generators: {matched} of the first {old_count} matched in {elapsed:.2f}s, '
+          f'so about {elapsed * count / old_count:.0f}s for all of them')
+
+
 if __name__ == '__main__':
     main()
@@ -1,12 +1,17 @@
 from collections import defaultdict
+from contextlib import redirect_stdout
 from functools import reduce
+from io import StringIO
 from itertools import chain
 from operator import mul
 import math
 import re
 import sys
+import time
 from typing import Dict, Optional, Tuple, List
 
+import numpy as np
+
 TILE_NAME_PARSER = re.compile(r'Tile (\d+):')
 
 N = 1j
@@ -22,6 +27,14 @@ SEA_MONSTER_REGEXES = [
     re.compile(r'.#..#..#..#..#..#...'),
 ]
 SEA_MONSTER_SIZE = 15
+SEA_MONSTER = [
+    '                  # ',
+    '#    ##    ##    ###',
+    ' #  #  #  #  #  #   ',
+]
+
+# sides of a tile, in the order they're stored in Jigsaw.edges
+TOP, RIGHT, BOTTOM, LEFT = range(4)
 
 
 class Tile:
@@ -85,8 +98,22 @@ def reverse_str(s):
 
 def main():
     with open(sys.argv[1]) as f:
-        tile_sections = f.read().strip().split('\n\n')
+        text = f.read()
+
+    jigsaw = Jigsaw.parse(text)
+    print(reduce(mul, jigsaw.corner_ids()))
+    image = jigsaw.image(jigsaw.assemble())
+    print(roughness(image, monster_orientations())[0])
+
+    if len(sys.argv) > 2 and sys.argv[2] == 'objects':
+        main_objects(text.strip().split('\n\n'))
+    elif len(sys.argv) > 2 and sys.argv[2] == 'benchmark':
+        benchmark()
+    elif len(sys.argv) > 2 and sys.argv[2] == 'check':
+        check()
 
+
+def main_objects(tile_sections: List[str]):
     tiles = {}
 
     for section in tile_sections:
@@ -180,15 +207,15 @@ def construct_tile_arrangement(corner_ids, edge_map, tiles):
         if len(matches) == 1:
             tile_id, edge_id = matches[0]
             tile = tiles[tile_id]
-            tile.neighbors_bounded[edge_id] = None
+            tile.neighbors[edge_id] = None
         else:
             assert len(matches) == 2, "Unexpected situation with more than 2 matches!"
             tile_id1, edge_id1 = matches[0]
             tile_id2, edge_id2 = matches[1]
-            tiles[tile_id1].neighbors_bounded[edge_id1] = matches[1]
-            tiles[tile_id2].neighbors_bounded[edge_id2] = matches[0]
+            tiles[tile_id1].neighbors[edge_id1] = matches[1]
+            tiles[tile_id2].neighbors[edge_id2] = matches[0]
     nw_corner = corner_tiles[0]
-    while not (nw_corner.neighbors_bounded[N] is None and nw_corner.neighbors_bounded[W] is None):
+    while not (nw_corner.neighbors[N] is None and nw_corner.neighbors[W] is None):
         nw_corner = nw_corner.rotated(1)
     tile_arrangement[0][0] = nw_corner
     prev_tile = nw_corner
@@ -204,7 +231,7 @@ def construct_tile_arrangement(corner_ids, edge_map, tiles):
 
 
 def get_east_neighbor(prev_tile, tiles):
-    next_tile_id, next_edge_id = prev_tile.neighbors_bounded[E]
+    next_tile_id, next_edge_id = prev_tile.neighbors[E]
     next_tile = tiles[next_tile_id]
     # rotate
     if next_edge_id != W:
@@ -218,7 +245,7 @@ def get_east_neighbor(prev_tile, tiles):
 
 
 def get_south_neighbor(prev_tile, tiles):
-    next_tile_id, next_edge_id = prev_tile.neighbors_bounded[S]
+    next_tile_id, next_edge_id = prev_tile.neighbors[S]
     next_tile = tiles[next_tile_id]
     # rotate
     if next_edge_id != N:
@@ -243,5 +270,264 @@ def rotations_needed(start_direction: complex, end_direction: complex) -> int:
         return 3
 
 
+def orientations(pixels: np.ndarray) -> np.ndarray:
+    """All 8 rotations and flips of the square(s) in the last two axes, as a new axis before them"""
+    flipped = np.swapaxes(pixels, -1, -2)
+    return np.stack([np.rot90(square, turns, axes=(-2, -1))
+                     for square in (pixels, flipped) for turns in range(4)], axis=-3)
+
+
+def reverse_bits_table(bits: int) -> np.ndarray:
+    """table[n] is n with its lowest `bits` bits in reverse order"""
+    values = np.arange(1 << bits)
+    table = np.zeros_like(values)
+    for bit in range(bits):
+        table |= ((values >> bit) & 1) << (bits - 1 - bit)
+    return table
+
+
+class Jigsaw:
+    """
+    Every tile in all 8 orientations, with each edge read as an int (top and
+    bottom left to right, left and right top to bottom, first pixel as the
+    highest bit), so two tiles fit side by side when one's RIGHT equals the
+    other's LEFT. Placements are numbered `tile * 8 + orientation`.
+    """
+    ids: List[int]
+    side: int
+    tile_size: int
+    # (tile, orientation, y, x)
+    tiles: np.ndarray
+    # placement -> [top, right, bottom, left]
+    edges: List[List[int]]
+    # placement -> whether each edge doesn't match any other tile's
+    outer: List[List[bool]]
+    # edge -> placements with it on that side
+    by_left: Dict[int, List[int]]
+    by_top: Dict[int, List[int]]
+
+    def __init__(self, ids: List[int], pixels: np.ndarray):
+        self.ids = ids
+        self.side = math.isqrt(len(ids))
+        self.tile_size = pixels.shape[-1]
+        self.tiles = orientations(pixels)
+
+        weights = 1 << np.arange(self.tile_size - 1, -1, -1)
+        edges = np.stack([self.tiles[..., 0, :] @ weights, self.tiles[..., :, -1] @ weights,
+                          self.tiles[..., -1, :] @ weights, self.tiles[..., :, 0] @ weights], axis=-1)
+        # the same whichever way round the edge is read
+        reversed_edges = reverse_bits_table(self.tile_size)
+        normalized = np.minimum(edges, reversed_edges[edges])
+        tiles_with_edge = np.bincount(normalized[:, 0].ravel(), minlength=1 << self.tile_size)
+        self.edges = edges.reshape(-1, 4).tolist()
+        self.outer = (tiles_with_edge[normalized] == 1).reshape(-1, 4).tolist()
+
+        self.by_left = defaultdict(list)
+        self.by_top = defaultdict(list)
+        for placement, (top, _, _, left) in enumerate(self.edges):
+            self.by_left[left].append(placement)
+            self.by_top[top].append(placement)
+
+    @staticmethod
+    def parse(text: str) -> 'Jigsaw':
+        sections = text.strip().split('\n\n')
+        ids = [int(TILE_NAME_PARSER.match(section).group(1)) for section in sections]
+        rows = [row for section in sections for row in section.split('\n')[1:]]
+        tile_size = len(rows[0])
+        pixels = np.frombuffer(''.join(rows).encode(), dtype=np.uint8) == ord('#')
+        return Jigsaw(ids, pixels.reshape(len(ids), tile_size, tile_size))
+
+    def corner_ids(self) -> List[int]:
+        return [tile_id for tile_id, outer in zip(self.ids, self.outer[::8]) if sum(outer) == 2]
+
+    def candidates(self, placed: List[int], used: List[bool]) -> List[int]:
+        """
+        Placements that could go in the next square in reading order: found in
+        the index by the edge of the tile to the left (or above), then checked
+        against every other edge constraint the square has, including having
+        outer edges along the border of the picture.
+        """
+        side = self.side
+        y, x = divmod(len(placed), side)
+        if x:
+            pool = self.by_left[self.edges[placed[-1]][RIGHT]]
+        elif y:
+            pool = self.by_top[self.edges[placed[-side]][BOTTOM]]
+        else:
+            pool = range(len(self.edges))
+        above = self.edges[placed[-side]][BOTTOM] if y else None
+        result = []
+        for placement in pool:
+            if used[placement // 8]:
+                continue
+            top, _, _, _ = edges = self.edges[placement]
+            outer = self.outer[placement]
+            if (top == above if y else outer[TOP]) and (x or outer[LEFT]) and \
+                    (x < side - 1 or outer[RIGHT]) and (y < side - 1 or outer[BOTTOM]):
+                result.append(placement)
+        return result
+
+    def assemble(self) -> List[int]:
+        """
+        The placement for every square of the picture in reading order. Each
+        placement rules out everything that doesn't fit next to it, so with
+        unique edges there's only ever one candidate after the first corner;
+        when there's more than one, the others are tried if it leads nowhere.
+        """
+        count = self.side * self.side
+        placed = []
+        used = [False] * len(self.ids)
+        choices = [self.candidates(placed, used)]
+        while len(placed) < count:
+            if not choices[-1]:
+                choices.pop()
+                if not choices:
+                    raise ValueError("The tiles don't fit together")
+                used[placed.pop() // 8] = False
+                continue
+            placement = choices[-1].pop()
+            placed.append(placement)
+            used[placement // 8] = True
+            if len(placed) < count:
+                choices.append(self.candidates(placed, used))
+        return placed
+
+    def image(self, placed: List[int]) -> np.ndarray:
+        """The picture, with every tile's border cut off"""
+        inner = self.tile_size - 2
+        crops = self.tiles.reshape(-1, self.tile_size, self.tile_size)[placed, 1:-1, 1:-1]
+        crops = crops.reshape(self.side, self.side, inner, inner)
+        return crops.transpose(0, 2, 1, 3).reshape(self.side * inner, self.side * inner)
+
+
+def monster_orientations() -> np.ndarray:
+    """
+    The sea monster in all 8 orientations, each in the top left corner of
+    the same size square so they can all be matched in one pass.
+    """
+    monster = np.array([[char == '#' for char in row] for row in SEA_MONSTER])
+    square = np.zeros((max(monster.shape),) * 2, dtype=bool)
+    square[:monster.shape[0], :monster.shape[1]] = monster
+    result = orientations(square)
+    # turning or flipping the square moves the monster away from its top left corner, so move it back
+    for i, oriented in enumerate(result):
+        rows, columns = np.nonzero(oriented)
+        result[i] = np.roll(oriented, (-rows.min(), -columns.min()), axis=(0, 1))
+    return result
+
+
+def find_monsters(image: np.ndarray, monsters: np.ndarray) -> np.ndarray:
+    """
+    found[orientation, y, x] is whether that orientation of the monster is
+    in the picture with its square's top left corner at (y, x). This is a 2-d
+    correlation of the picture with every monster at once: for each pixel
+    offset, the shifted picture is ANDed into the monsters with a pixel there.
+    """
+    height, width = image.shape
+    size = monsters.shape[-1]
+    padded = np.zeros((height + size - 1, width + size - 1), dtype=bool)
+    padded[:height, :width] = image
+    found = np.ones((len(monsters), height, width), dtype=bool)
+    for dy, dx in zip(*np.nonzero(monsters.any(axis=0))):
+        found[monsters[:, dy, dx]] &= padded[dy:dy + height, dx:dx + width]
+    return found
+
+
+def roughness(image: np.ndarray, monsters: np.ndarray) -> Tuple[int, int]:
+    """The number of '#' that aren't part of any sea monster, and how many monsters there are"""
+    found = find_monsters(image, monsters)
+    height, width = image.shape
+    size = monsters.shape[-1]
+    covered = np.zeros((height + size - 1, width + size - 1), dtype=bool)
+    for dy, dx in zip(*np.nonzero(monsters.any(axis=0))):
+        covered[dy:dy + height, dx:dx + width] |= found[monsters[:, dy, dx]].any(axis=0)
+    return int(image.sum() - covered[:height, :width].sum()), int(found.sum())
+
+
+def random_puzzle(side: int, tile_size: int = 10, seed=0) -> Tuple[str, np.ndarray]:
+    """
+    A puzzle input made by cutting a random picture into side x side tiles,
+    shuffled and each in a random orientation, along with the picture
+    without the tile borders. Neighbouring tiles share their border, and no
+    two borders are the same either way round, like the real puzzle. That
+    takes 2 * side * (side + 1) distinct edges, so big puzzles need bigger tiles.
+    """
+    rng = np.random.default_rng(seed)
+    step = tile_size - 1
+    size = side * step + 1
+    picture = rng.random((size, size)) < 0.5
+
+    reversed_edges = reverse_bits_table(tile_size)
+    weights = 1 << np.arange(tile_size - 1, -1, -1)
+    seen = set()
+    for lines in (picture, picture.T):
+        for y in range(0, size, step):
+            for x in range(0, size - 1, step):
+                # a view, so redrawing it changes the picture
+                edge = lines[y, x:x + tile_size]
+                while True:
+                    value = int(edge @ weights)
+                    normalized = min(value, int(reversed_edges[value]))
+                    if normalized not in seen:
+                        break
+                    edge[1:-1] = rng.random(tile_size - 2) < 0.5
+                seen.add(normalized)
+
+    tiles = np.lib.stride_tricks.sliding_window_view(picture, (tile_size, tile_size))[::step, ::step]
+    tiles = orientations(tiles.reshape(-1, tile_size, tile_size))
+    tiles = tiles[np.arange(len(tiles)), rng.integers(8, size=len(tiles))]
+    order = rng.permutation(len(tiles))
+    ids = rng.choice(np.arange(1000, 1000 + 10 * len(tiles)), len(tiles), replace=False)
+
+    chars = np.full((len(tiles), tile_size, tile_size + 1), ord('\n'), dtype=np.uint8)
+    chars[:, :, :-1] = np.where(tiles[order], ord('#'), ord('.'))
+    text = '\n'.join(f'Tile {tile_id}:\n' + tile.tobytes().decode() for tile_id, tile in zip(ids, chars))
+
+    inner = np.arange(size) % step != 0
+    return text, picture[inner][:, inner]
+
+
+def check(size=40):
+    """
+    Plants one monster in each orientation against each edge of an empty
+    picture, and checks roughness finds exactly that one.
+    """
+    monsters = monster_orientations()
+    for orientation, monster in enumerate(monsters):
+        rows, columns = np.nonzero(monster)
+        monster = monster[rows.min():rows.max() + 1, columns.min():columns.max() + 1]
+        height, width = monster.shape
+        for y, x in ((0, 0), (0, size - width), (size - height, 0), (size - height, size - width),
+                     (0, (size - width) // 2), ((size - height) // 2, 0)):
+            image = np.zeros((size, size), dtype=bool)
+            image[y:y + height, x:x + width] = monster
+            assert roughness(image, monsters) == (0, 1), (orientation, y, x)
+    print(f'monsters found against every edge in all {len(monsters)} orientations')
+
+
+def benchmark():
+    monsters = monster_orientations()
+    for side, tile_size in ((12, 10), (30, 12), (100, 16)):
+        text, picture = random_puzzle(side, tile_size)
+        print(f'--- {side}x{side} tiles of {tile_size}x{tile_size} ---')
+        start = time.perf_counter()
+        jigsaw = Jigsaw.parse(text)
+        parsed = time.perf_counter()
+        corners = reduce(mul, jigsaw.corner_ids())
+        image = jigsaw.image(jigsaw.assemble())
+        assembled = time.perf_counter()
+        rough, monster_count = roughness(image, monsters)
+        done = time.perf_counter()
+        assert any(np.array_equal(image, oriented) for oriented in orientations(picture))
+        print(f'arrays: corners {corners}, {monster_count} monsters, roughness {rough}, '
+              f'{parsed - start:.3f}s to parse, {assembled - parsed:.3f}s to assemble, '
+              f'{done - assembled:.3f}s to find monsters')
+
+        start = time.perf_counter()
+        with redirect_stdout(StringIO()):
+            main_objects(text.split('\n\n'))
+        print(f'objects: in {time.perf_counter() - start:.3f}s')
+
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -20,6 +20,51 @@ def main():
     with open(sys.argv[1]) as f:
         ingredient_lists = [IngredientList(line) for line in f.readlines()]
 
+    # ingredients and allergens as bits, in order of first appearance
+    ingredients = list(dict.fromkeys(itertools.chain.from_iterable(il.ingredients for il in ingredient_lists)))
+    ingredient_bits = {ingredient: 1 << i for i, ingredient in enumerate(ingredients)}
+    list_masks = [sum(ingredient_bits[ingredient] for ingredient in il.ingredients) for il in ingredient_lists]
+    allergens = sorted(set(itertools.chain.from_iterable(il.allergens for il in ingredient_lists)))
+
+    # the ingredient with an allergen is in every list that mentions it
+    candidates = []
+    for allergen in allergens:
+        candidates.append(functools.reduce(
+            lambda mask, list_mask: mask & list_mask,
+            (mask for il, mask in zip(ingredient_lists, list_masks) if allergen in il.allergens)))
+
+    # part1
+    maybe_allergens = functools.reduce(lambda mask, candidate: mask | candidate, candidates)
+    print(sum((mask & ~maybe_allergens).bit_count() for mask in list_masks))
+
+    # part2
+    print(','.join(ingredients[i] for i in assign_allergens(candidates)))
+
+    if len(sys.argv) > 2 and sys.argv[2] == 'sets':
+        main_sets(ingredient_lists)
+
+
+def assign_allergens(candidates):
+    """
+    The ingredient for each allergen, given each one's mask of candidate
+    ingredients: an allergen down to one candidate takes it, and it's taken
+    away from every other allergen, until they've all got one.
+    """
+    candidates = list(candidates)
+    assignment = [-1] * len(candidates)
+    unassigned = set(range(len(candidates)))
+    while unassigned:
+        allergen = next((a for a in unassigned if candidates[a] & (candidates[a] - 1) == 0), None)
+        if allergen is None or not candidates[allergen]:
+            raise ValueError(f'No single ingredient for {len(unassigned)} allergens')
+        unassigned.remove(allergen)
+        assignment[allergen] = candidates[allergen].bit_length() - 1
+        for other in unassigned:
+            candidates[other] &= ~candidates[allergen]
+    return assignment
+
+
+def main_sets(ingredient_lists):
     # part1
     possible_ingredients = {}
     for il in ingredient_lists:
@@ -52,7 +97,5 @@ def main():
     print(','.join(ingredient for allergen, ingredient in sorted(final_allergen_map.items())))
 
 
-
-
 if __name__ == '__main__':
     main()
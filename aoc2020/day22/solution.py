@@ -1,6 +1,14 @@
 from collections import deque
 import itertools
+import random
 import sys
+import time
+import tracemalloc
+from typing import List, Tuple
+
+HASH_MASK = (1 << 64) - 1
+# odd, so multiplying by it loses nothing mod 2 ** 64
+HASH_BASE = 0x9E3779B97F4A7C15
 
 
 def main():
@@ -8,7 +16,26 @@ def main():
         sections = f.read().strip().split('\n\n')
 
     part1(sections)
-    part2(sections)
+
+    deck1 = list(parse_deck(sections[0]))
+    deck2 = list(parse_deck(sections[1]))
+    stats = CombatStats()
+    start = time.perf_counter()
+    _, winning_deck = RecursiveCombat(deck1, deck2, stats).play()
+    elapsed = time.perf_counter() - start
+    print(count_score(winning_deck))
+
+    # again with tracemalloc on, which would slow down the timed run a lot
+    tracemalloc.start()
+    RecursiveCombat(deck1, deck2).play()
+    stats.peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f'    {stats} in {elapsed:.3f}s')
+
+    if len(sys.argv) > 2 and sys.argv[2] == 'deques':
+        part2(sections)
+    elif len(sys.argv) > 2 and sys.argv[2] == 'benchmark':
+        benchmark()
 
 
 def part1(sections):
@@ -74,6 +101,184 @@ def iterate_decks_recursive(deck1, deck2):
         deck2.append(deck1.popleft())
 
 
+class CombatStats:
+    sub_games: int
+    played: int
+    shortcuts: int
+    cache_hits: int
+    peak_memory: int
+
+    def __init__(self):
+        self.sub_games = 0
+        self.played = 0
+        self.shortcuts = 0
+        self.cache_hits = 0
+        self.peak_memory = 0
+
+    def __repr__(self):
+        lookups = self.sub_games - self.shortcuts
+        hit_rate = self.cache_hits / lookups if lookups else 0
+        return (f'{self.sub_games} sub-games, {self.played} played, {self.shortcuts} won by the highest card, '
+                f'cache hit rate {hit_rate:.1%}, peak memory {self.peak_memory / 1024:.0f} KiB')
+
+
+class RecursiveCombat:
+    """
+    Recursive combat with each deck in a ring buffer, one pair of buffers
+    per level of sub-game, allocated once and reused by every sub-game at
+    that level.
+
+    Decks are identified by a rolling hash, kept up to date as cards are
+    drawn and put back instead of rebuilt every round: sum(card * B ** i)
+    mod 2 ** 64, with i counting from the bottom card. Both decks' hashes
+    together are the key for the rounds seen so far in a game, and for the
+    cache of sub-game winners shared by the whole game. Hash collisions are
+    taken to be rare enough to ignore.
+
+    Sub-games where player 1 holds the highest card aren't played at all:
+    that card can never go into a sub-game itself (that would take more
+    cards than there are), so player 1 never loses it, and either wins or
+    the game repeats, which player 1 also wins.
+    """
+    deck1: List[int]
+    deck2: List[int]
+    capacity: int
+    # B ** n mod 2 ** 64, to take the top card out of a deck of n + 1
+    powers: List[int]
+    # one (player 1 buffer, player 2 buffer) per level of sub-game
+    buffers: List[Tuple[List[int], List[int]]]
+    # both decks' hashes -> winner
+    results: dict[int, int]
+    stats: CombatStats
+
+    def __init__(self, deck1: List[int], deck2: List[int], stats: CombatStats = None):
+        self.deck1 = deck1
+        self.deck2 = deck2
+        self.capacity = len(deck1) + len(deck2)
+        self.powers = [1]
+        for _ in range(self.capacity):
+            self.powers.append(self.powers[-1] * HASH_BASE & HASH_MASK)
+        self.buffers = []
+        self.results = {}
+        self.stats = stats or CombatStats()
+
+    def play(self) -> Tuple[int, List[int]]:
+        """The winner, and their deck at the end"""
+        return self.play_game(self.deck1, self.deck2, 0)
+
+    def sub_game_winner(self, deck1: List[int], deck2: List[int], depth: int) -> int:
+        stats = self.stats
+        stats.sub_games += 1
+        if max(deck1) > max(deck2):
+            stats.shortcuts += 1
+            return 1
+        key = deck_hash(deck1) << 64 | deck_hash(deck2)
+        winner = self.results.get(key)
+        if winner:
+            stats.cache_hits += 1
+            return winner
+        winner, _ = self.play_game(deck1, deck2, depth)
+        self.results[key] = winner
+        return winner
+
+    def play_game(self, deck1: List[int], deck2: List[int], depth: int) -> Tuple[int, List[int]]:
+        self.stats.played += 1
+        size = self.capacity
+        powers = self.powers
+        if depth == len(self.buffers):
+            self.buffers.append(([0] * size, [0] * size))
+        ring1, ring2 = self.buffers[depth]
+        ring1[:len(deck1)] = deck1
+        ring2[:len(deck2)] = deck2
+        head1 = head2 = 0
+        length1 = len(deck1)
+        length2 = len(deck2)
+        hash1 = deck_hash(deck1)
+        hash2 = deck_hash(deck2)
+
+        seen = set()
+        winner = 0
+        while length1 and length2:
+            key = hash1 << 64 | hash2
+            if key in seen:
+                winner = 1
+                break
+            seen.add(key)
+
+            card1 = ring1[head1]
+            card2 = ring2[head2]
+            head1 = (head1 + 1) % size
+            head2 = (head2 + 1) % size
+            length1 -= 1
+            length2 -= 1
+            hash1 = (hash1 - card1 * powers[length1]) & HASH_MASK
+            hash2 = (hash2 - card2 * powers[length2]) & HASH_MASK
+
+            if length1 >= card1 and length2 >= card2:
+                round_winner = self.sub_game_winner([ring1[(head1 + i) % size] for i in range(card1)],
+                                                    [ring2[(head2 + i) % size] for i in range(card2)], depth + 1)
+            else:
+                round_winner = 1 if card1 > card2 else 2
+
+            if round_winner == 1:
+                ring1[(head1 + length1) % size] = card1
+                ring1[(head1 + length1 + 1) % size] = card2
+                length1 += 2
+                hash1 = ((hash1 * HASH_BASE + card1) * HASH_BASE + card2) & HASH_MASK
+            else:
+                ring2[(head2 + length2) % size] = card2
+                ring2[(head2 + length2 + 1) % size] = card1
+                length2 += 2
+                hash2 = ((hash2 * HASH_BASE + card2) * HASH_BASE + card1) & HASH_MASK
+
+        if not winner:
+            winner = 1 if length1 else 2
+        if winner == 1:
+            return 1, [ring1[(head1 + i) % size] for i in range(length1)]
+        return 2, [ring2[(head2 + i) % size] for i in range(length2)]
+
+
+def deck_hash(deck: List[int]) -> int:
+    result = 0
+    for card in deck:
+        result = (result * HASH_BASE + card) & HASH_MASK
+    return result
+
+
+def random_decks(card_count: int, seed=0) -> Tuple[List[int], List[int]]:
+    cards = list(range(1, card_count + 1))
+    random.Random(seed).shuffle(cards)
+    return cards[:card_count // 2], cards[card_count // 2:]
+
+
+def benchmark(seeds=10):
+    """Peak memory is measured on one more run of the first deal, with tracemalloc on"""
+    for card_count in (40, 50, 60):
+        print(f'--- {seeds} random deals of {card_count} cards ---')
+        for name in ('ring buffers', 'deques'):
+            stats = CombatStats()
+            start = time.perf_counter()
+            for seed in range(seeds):
+                play_random_deal(name, card_count, seed, stats)
+            elapsed = time.perf_counter() - start
+
+            tracemalloc.start()
+            play_random_deal(name, card_count, 0, CombatStats())
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            stats.peak_memory = peak_memory
+            details = stats if name == 'ring buffers' else f'peak memory {peak_memory / 1024:.0f} KiB'
+            print(f'{name}: {details} in {elapsed:.2f}s')
+
+
+def play_random_deal(name: str, card_count: int, seed: int, stats: CombatStats):
+    deck1, deck2 = random_decks(card_count, seed)
+    if name == 'deques':
+        recursive_combat(deque(deck1), deque(deck2))
+    else:
+        RecursiveCombat(deck1, deck2, stats).play()
+
+
 def parse_deck(section: str):
     lines = section.strip().split('\n')
     return deque(int(line) for line in lines[1:])  # skip player N line
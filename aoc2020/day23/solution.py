@@ -1,21 +1,8 @@
+from array import array
 import itertools
 import sys
 
 
-class Node:
-    def __init__(self, label):
-        self.next = None
-        self.prev = None
-        self.label: int = label
-
-    def set_next(self, next_node):
-        self.next = next_node
-        next_node.prev = self
-
-    def __repr__(self):
-        return f'Node(label={self.label})'
-
-
 def main():
     with open(sys.argv[1]) as f:
         initial_input = [int(c) for c in f.read().strip()]
@@ -24,81 +11,73 @@ def main():
     part2(initial_input)
 
 
+def link_cups(labels, size):
+    """
+    The circle as a successor array: next_cup[label] is the label of the cup
+    clockwise of it. Labels double as indexes, so index 0 is unused.
+    """
+    next_cup = array('I', range(size))
+    labels = iter(labels)
+    first = previous = next(labels)
+    for label in labels:
+        next_cup[previous] = label
+        previous = label
+    next_cup[previous] = first
+    return next_cup
+
+
 def part1(initial_input):
-    first = Node(initial_input[0])
-    current = first
-    indexed_nodes = {initial_input[0]: first}
-    for v in initial_input[1:]:
-        node = Node(v)
-        indexed_nodes[v] = node
-        current.set_next(node)
-        current = node
-    current.set_next(first)
-
-    current = first
+    next_cup = link_cups(initial_input, len(initial_input) + 1)
+
+    current = initial_input[0]
     for i in range(100):
-        current = iterate(current, indexed_nodes, 9)
+        current = iterate(current, next_cup, 9)
 
-    print(get_output(indexed_nodes[1]))
+    print(get_output(next_cup))
 
 
 def part2(initial_input):
     max_val = max(initial_input)
     extended_input = itertools.chain(
-        initial_input[1:],
+        initial_input,
         range(max_val + 1, 1_000_001))
-    first = Node(initial_input[0])
-    current = first
-    indexed_nodes = {initial_input[0]: first}
-    for v in extended_input:
-        node = Node(v)
-        indexed_nodes[v] = node
-        current.set_next(node)
-        current = node
-    current.set_next(first)
-
-    current = first
+    next_cup = link_cups(extended_input, 1_000_001)
+
+    current = initial_input[0]
     for i in range(10_000_000):
-        current = iterate(current, indexed_nodes, 1_000_000)
+        current = iterate(current, next_cup, 1_000_000)
         if i % 100_000 == 0:
             print('iteration', i)
 
-    next_cup = indexed_nodes[1].next
-    next_next_cup = next_cup.next
-    print(next_cup.label * next_next_cup.label)
+    next_cup_label = next_cup[1]
+    next_next_cup_label = next_cup[next_cup_label]
+    print(next_cup_label * next_next_cup_label)
 
 
-def get_output(node1):
-    current = node1.next
-    labels = [current.label]
-    while True:
-        next_node = current.next
-        if next_node == node1:
-            break
-        labels.append(next_node.label)
-        current = next_node
+def get_output(next_cup):
+    labels = []
+    label = next_cup[1]
+    while label != 1:
+        labels.append(label)
+        label = next_cup[label]
     return ''.join(str(label) for label in labels)
 
 
-def iterate(current, indexed_nodes, max_val):
-    first_removed = current.next
-    second_removed = first_removed.next
-    third_removed = second_removed.next
-    removed_cups = {first_removed, second_removed, third_removed}
-    current.set_next(third_removed.next)
+def iterate(current, next_cup, max_val):
+    first_removed = next_cup[current]
+    second_removed = next_cup[first_removed]
+    third_removed = next_cup[second_removed]
+    next_cup[current] = next_cup[third_removed]
 
-    current_label = current.label
+    destination = current
     while True:
-        new_label = current_label - 1 if current_label > 1 else max_val
-        destination = indexed_nodes[new_label]
-        current_label = new_label
-        if destination not in removed_cups:
+        destination = destination - 1 if destination > 1 else max_val
+        if destination != first_removed and destination != second_removed and destination != third_removed:
             break
 
-    old_destination_next = destination.next
-    destination.set_next(first_removed)
-    third_removed.set_next(old_destination_next)
-    return current.next
+    next_cup[third_removed] = next_cup[destination]
+    next_cup[destination] = first_removed
+    return next_cup[current]
 
 
 if __name__ == '__main__':
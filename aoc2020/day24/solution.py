@@ -1,6 +1,10 @@
 from collections import defaultdict
 import re
 import sys
+import time
+from typing import Iterable, Set
+
+import numpy as np
 
 
 WHITE = True
@@ -30,7 +34,15 @@ def main():
         sequences = [PARSER.findall(line.strip()) for line in f.readlines()]
 
     tiles = part1(sequences)
-    part2(tiles)
+
+    floor = HexFloor(coord for coord, color in tiles.items() if color == BLACK)
+    floor.run(100)
+    print(floor.count_black())
+
+    if len(sys.argv) > 2 and sys.argv[2] == 'dicts':
+        part2(tiles)
+    elif len(sys.argv) > 2 and sys.argv[2] == 'benchmark':
+        benchmark(tiles, int(sys.argv[3]) if len(sys.argv) > 3 else 1000)
 
 
 def part1(sequences):
@@ -92,5 +104,128 @@ def iterate_tiles(tiles):
     return new_tiles
 
 
+WORD_BITS = 64
+ONE = np.uint64(1)
+LAST_BIT = np.uint64(WORD_BITS - 1)
+
+
+class HexFloor:
+    """
+    The floor in axial coordinates: the tile at complex coordinate q + r*1j
+    is bit (q - q_origin) of row (r - r_origin), with each row packed into
+    64-bit words, lowest q in the lowest bit. Its six neighbours are q +- 1
+    in its own row, q and q - 1 in the row above, and q and q + 1 in the row
+    below, so a generation is a six-neighbour convolution done with shifts
+    and a bitwise adder, 64 tiles per operation.
+
+    The outermost rows and words are always kept white, so nothing outside
+    the grid can turn black; when a black tile gets close, the grid grows.
+    """
+    rows: np.ndarray
+    q_origin: int
+    r_origin: int
+    days: int
+
+    def __init__(self, black_tiles: Iterable[complex]):
+        black_tiles = list(black_tiles)
+        qs = np.array([int(tile.real) for tile in black_tiles], dtype=np.int64)
+        rs = np.array([int(tile.imag) for tile in black_tiles], dtype=np.int64)
+        self.q_origin = int(qs.min(initial=0)) - WORD_BITS
+        self.r_origin = int(rs.min(initial=0)) - 2
+        width = int(qs.max(initial=0)) - self.q_origin + 1
+        self.rows = np.zeros((int(rs.max(initial=0)) - self.r_origin + 3, width // WORD_BITS + 2), dtype=np.uint64)
+        qs -= self.q_origin
+        np.bitwise_or.at(self.rows, (rs - self.r_origin, qs // WORD_BITS),
+                         ONE << (qs % WORD_BITS).astype(np.uint64))
+        self.days = 0
+
+    def grow(self):
+        """Adds room on every side that has a black tile within a row or a word of the edge"""
+        rows = self.rows
+        height, width = rows.shape
+        # grow by a quarter each time, so growing takes amortized constant time per day
+        extra_rows = max(2, height // 4)
+        extra_words = max(1, width // 4)
+        pad = ((extra_rows if rows[:2].any() else 0, extra_rows if rows[-2:].any() else 0),
+               (extra_words if rows[:, 0].any() else 0, extra_words if rows[:, -1].any() else 0))
+        if any(before or after for before, after in pad):
+            self.rows = np.pad(rows, pad)
+            self.r_origin -= pad[0][0]
+            self.q_origin -= pad[1][0] * WORD_BITS
+
+    def step(self):
+        self.grow()
+        new_rows = np.zeros_like(self.rows)
+        new_rows[1:-1] = next_generation(self.rows)
+        self.rows = new_rows
+        self.days += 1
+
+    def run(self, days: int):
+        for _ in range(days):
+            self.step()
+
+    def count_black(self) -> int:
+        return int(np.bitwise_count(self.rows).sum())
+
+    def black_tiles(self) -> Set[complex]:
+        bits = np.unpackbits(self.rows.astype('<u8').view(np.uint8), axis=1, bitorder='little')
+        rs, qs = np.nonzero(bits)
+        return {complex(q + self.q_origin, r + self.r_origin) for q, r in zip(qs.tolist(), rs.tolist())}
+
+
+def next_generation(rows: np.ndarray) -> np.ndarray:
+    """The next day for every row but the first and last, which are only there as neighbours"""
+    # bit q of west is the tile at q - 1, and of east the tile at q + 1
+    west = rows << ONE
+    west[:, 1:] |= rows[:, :-1] >> LAST_BIT
+    east = rows >> ONE
+    east[:, :-1] |= rows[:, 1:] << LAST_BIT
+
+    neighbors = (west[1:-1], east[1:-1], rows[2:], west[2:], rows[:-2], east[:-2])
+    # add up the six neighbours in pairs: each pair gives a sum bit and a carry (worth 2)
+    sums = [a ^ b for a, b in zip(neighbors[::2], neighbors[1::2])]
+    carries = [a & b for a, b in zip(neighbors[::2], neighbors[1::2])]
+    # add up the three sum bits, into ones and one more carry
+    partial = sums[0] ^ sums[1]
+    ones = partial ^ sums[2]
+    carries.append((sums[0] & sums[1]) | (partial & sums[2]))
+    # the count is ones + 2 * (number of carries), so it's 1 or 2 with no carries or exactly one
+    any_pair = carries[0] | carries[1]
+    any_other_pair = carries[2] | carries[3]
+    any_carry = any_pair | any_other_pair
+    several_carries = (carries[0] & carries[1]) | (carries[2] & carries[3]) | (any_pair & any_other_pair)
+    one_black_neighbor = ones & ~any_carry
+    two_black_neighbors = ~ones & any_carry & ~several_carries
+    return two_black_neighbors | (rows[1:-1] & one_black_neighbor)
+
+
+def benchmark(tiles, days: int):
+    black_tiles = [coord for coord, color in tiles.items() if color == BLACK]
+    dict_days = 100
+    start = time.perf_counter()
+    current = tiles
+    for _ in range(dict_days):
+        current = iterate_tiles(current)
+    dict_time = time.perf_counter() - start
+    floor = HexFloor(black_tiles)
+    floor.run(dict_days)
+    assert floor.black_tiles() == {coord for coord, color in current.items() if color == BLACK}
+    print(f'dicts: {dict_days} days in {dict_time:.2f}s')
+
+    floor = HexFloor(black_tiles)
+    start = time.perf_counter()
+    tile_days = 0
+    checkpoint = 100
+    while floor.days < days:
+        floor.step()
+        tile_days += floor.rows.size * WORD_BITS
+        if floor.days == min(checkpoint, days):
+            elapsed = time.perf_counter() - start
+            height, words = floor.rows.shape
+            print(f'bits: day {floor.days}, {floor.count_black()} black, {height}x{words * WORD_BITS} grid, '
+                  f'{elapsed:.2f}s so far, {tile_days / elapsed / 1e9:.2f} billion tiles/s')
+            checkpoint *= 2
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,141 @@
+from array import array
+import functools
+import math
+import os
+from typing import Dict, Optional, Sequence
+
+
+class BabyStepTable:
+    """
+    Solves base ** x == target (mod modulus) with baby-step giant-step: the
+    table maps base ** j -> j for every j < steps, so any x < order is found
+    within order / steps giant steps, each multiplying the target by
+    base ** -steps and looking it up.
+    """
+    base: int
+    modulus: int
+    order: int
+    steps: int
+    table: Dict[int, int]
+    giant_step: int
+
+    def __init__(self, base: int, modulus: int, order: Optional[int] = None, powers: Optional[Sequence[int]] = None):
+        self.base = base
+        self.modulus = modulus
+        # any multiple of the real order works, which for a prime modulus modulus - 1 always is
+        self.order = order or modulus - 1
+        self.steps = math.isqrt(self.order - 1) + 1
+        if powers is None:
+            powers = []
+            value = 1
+            for j in range(self.steps):
+                powers.append(value)
+                value = value * base % modulus
+        self.table = {}
+        for j, value in enumerate(powers):
+            self.table.setdefault(value, j)
+        self.giant_step = pow(base, -self.steps, modulus)
+
+    @staticmethod
+    def cached(base: int, modulus: int, cache_dir: str) -> 'BabyStepTable':
+        """
+        The table for a prime modulus below 2 ** 64, kept in cache_dir as the
+        baby steps base ** j in order. A file that can't be read or doesn't look right
+        is just built and saved again.
+        """
+        path = os.path.join(cache_dir, f'baby_steps_{base}_{modulus}.bin')
+        steps = math.isqrt(modulus - 2) + 1
+        powers = array('Q')
+        try:
+            with open(path, 'rb') as f:
+                powers.fromfile(f, steps)
+                complete = f.read(1) == b''
+            if complete and powers[0] == 1 and all(
+                    powers[j] == powers[j - 1] * base % modulus for j in range(1, steps)):
+                return BabyStepTable(base, modulus, powers=powers)
+        except (OSError, EOFError, ValueError):
+            pass
+        powers = array('Q', [1] * steps)
+        for j in range(1, steps):
+            powers[j] = powers[j - 1] * base % modulus
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(path, 'wb') as f:
+            powers.tofile(f)
+        return BabyStepTable(base, modulus, powers=powers)
+
+    def log(self, target: int) -> int:
+        """The smallest x >= 0 with base ** x == target"""
+        table = self.table
+        giant_step = self.giant_step
+        modulus = self.modulus
+        value = target % modulus
+        for i in range(-(-self.order // self.steps)):
+            j = table.get(value)
+            if j is not None:
+                return i * self.steps + j
+            value = value * giant_step % modulus
+        raise ValueError(f'{target} is not a power of {self.base} mod {self.modulus}')
+
+
+@functools.lru_cache(maxsize=64)
+def subgroup_table(base: int, modulus: int, order: int) -> BabyStepTable:
+    """Baby steps for a subgroup of prime order, kept for later discrete_log calls with the same modulus"""
+    return BabyStepTable(base, modulus, order)
+
+
+@functools.lru_cache(maxsize=64)
+def factorize(n: int) -> Dict[int, int]:
+    """prime -> exponent, by trial division, which only has to go up to the second largest prime factor"""
+    factors = {}
+    p = 2
+    while p * p <= n:
+        while n % p == 0:
+            factors[p] = factors.get(p, 0) + 1
+            n //= p
+        p += 1 if p == 2 else 2
+    if n > 1:
+        factors[n] = factors.get(n, 0) + 1
+    return factors
+
+
+def multiplicative_order(base: int, modulus: int, group_factors: Dict[int, int]) -> int:
+    """The smallest n > 0 with base ** n == 1, given the factors of a multiple of it"""
+    order = math.prod(p ** e for p, e in group_factors.items())
+    for p in group_factors:
+        while order % p == 0 and pow(base, order // p, modulus) == 1:
+            order //= p
+    return order
+
+
+def discrete_log(base: int, target: int, modulus: int, group_order: Optional[int] = None) -> int:
+    """
+    The smallest x >= 0 with base ** x == target (mod modulus), by
+    Pohlig-Hellman: x is worked out mod each prime power p ** e dividing the
+    order of base, one base-p digit at a time with a baby-step giant-step
+    search in the subgroup of order p, and the results combined with the
+    Chinese remainder theorem. That takes about sqrt(p) steps for the
+    largest prime p, so it's fast whenever the order is smooth, and no
+    worse than plain baby-step giant-step when it isn't. Factorizations and
+    baby-step tables are kept between calls.
+
+    group_order defaults to modulus - 1, the size of the group for a prime modulus.
+    """
+    target %= modulus
+    group_factors = factorize(group_order or modulus - 1)
+    order = multiplicative_order(base, modulus, group_factors)
+    x = 0
+    combined_modulus = 1
+    for p, e in factorize(order).items():
+        prime_power = p ** e
+        digits = subgroup_table(pow(base, order // p, modulus), modulus, p)
+        residue = 0
+        for k in range(e):
+            # what's left of the target once the digits found so far are taken out, in the subgroup of order p
+            remaining = pow(base, -residue, modulus) * target % modulus
+            residue += digits.log(pow(remaining, order // p ** (k + 1), modulus)) * p ** k
+        # x == residue (mod prime_power), combined with what's known mod combined_modulus
+        x += combined_modulus * ((residue - x) * pow(combined_modulus, -1, prime_power) % prime_power)
+        combined_modulus *= prime_power
+    if pow(base, x, modulus) != target:
+        raise ValueError(f'{target} is not a power of {base} mod {modulus}')
+    return x
@@ -1,15 +1,36 @@
+import os
+import random
 import sys
+import tempfile
+import time
 from typing import Tuple
 
+import discrete_log
 
 MOD_BASE = 20201227
+SUBJECT_NUMBER = 7
 
 
 def main():
     with open(sys.argv[1]) as f:
         keys = [int(line.strip()) for line in f.readlines()]
 
-    part1(7, (keys[0], keys[1]))
+    card_key, door_key = keys[0], keys[1]
+    if len(sys.argv) > 2 and sys.argv[2] == 'cached':
+        # e.g. `solution.py input.txt cached [directory]`, by default in the user's cache directory
+        cache_dir = sys.argv[3] if len(sys.argv) > 3 else os.path.join(os.path.expanduser('~'), '.cache', 'aoc2020')
+        baby_steps = discrete_log.BabyStepTable.cached(SUBJECT_NUMBER, MOD_BASE, cache_dir)
+    else:
+        baby_steps = discrete_log.BabyStepTable(SUBJECT_NUMBER, MOD_BASE)
+    card_loop_size = baby_steps.log(card_key)
+    door_loop_size = baby_steps.log(door_key)
+    print(card_loop_size, door_loop_size)
+    print(pow(door_key, card_loop_size, MOD_BASE))
+
+    if len(sys.argv) > 2 and sys.argv[2] == 'brute-force':
+        part1(SUBJECT_NUMBER, (card_key, door_key))
+    elif len(sys.argv) > 2 and sys.argv[2] == 'benchmark':
+        benchmark()
 
 
 def part1(subject_number: int, target_numbers: Tuple[int, int]):
@@ -33,5 +54,58 @@ def part1(subject_number: int, target_numbers: Tuple[int, int]):
     print(value)
 
 
+def brute_force_log(base: int, target: int, modulus: int) -> int:
+    value = 1
+    x = 0
+    while value != target:
+        value = value * base % modulus
+        x += 1
+    return x
+
+
+def benchmark(key_count=100, brute_force_count=5):
+    # (modulus, a primitive root, factors of modulus - 1)
+    moduli = [
+        (MOD_BASE, SUBJECT_NUMBER, '2 * 3 * 29 * 116099'),
+        (998244353, 3, '2^23 * 7 * 17'),
+        (1_000_000_007, 5, '2 * 500000003'),
+        (2 ** 61 - 1, 37, '2 * 3^2 * 5^2 * 7 * 11 * 13 * 31 * 41 * 61 * 151 * 331 * 1321'),
+    ]
+    rng = random.Random(0)
+    for modulus, base, factors in moduli:
+        print(f'--- mod {modulus}, {key_count} random keys, order {factors} ---')
+        exponents = [rng.randrange(modulus - 1) for _ in range(key_count)]
+        keys = [pow(base, x, modulus) for x in exponents]
+
+        start = time.perf_counter()
+        assert [discrete_log.discrete_log(base, key, modulus) for key in keys] == exponents
+        print(f'pohlig-hellman: in {time.perf_counter() - start:.3f}s')
+
+        if modulus < 2 ** 32:
+            start = time.perf_counter()
+            baby_steps = discrete_log.BabyStepTable(base, modulus)
+            built = time.perf_counter()
+            assert [baby_steps.log(key) for key in keys] == exponents
+            print(f'baby-step giant-step: {baby_steps.steps} baby steps, {built - start:.3f}s to build the table, '
+                  f'{time.perf_counter() - built:.3f}s for the keys')
+
+        if modulus == MOD_BASE:
+            with tempfile.TemporaryDirectory() as cache_dir:
+                discrete_log.BabyStepTable.cached(base, modulus, cache_dir)
+                start = time.perf_counter()
+                baby_steps = discrete_log.BabyStepTable.cached(base, modulus, cache_dir)
+                loaded = time.perf_counter()
+                assert [baby_steps.log(key) for key in keys] == exponents
+                print(f'cached baby-step giant-step: {loaded - start:.3f}s to load the table, '
+                      f'{time.perf_counter() - loaded:.3f}s for the keys')
+
+            start = time.perf_counter()
+            assert [brute_force_log(base, key, modulus) for key in keys[:brute_force_count]] == \
+                exponents[:brute_force_count]
+            elapsed = time.perf_counter() - start
+            print(f'brute force: {brute_force_count} keys in {elapsed:.2f}s, '
+                  f'so about {elapsed * key_count / brute_force_count:.0f}s for all of them')
+
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()